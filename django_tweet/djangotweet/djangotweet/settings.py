@@ -75,10 +75,82 @@ WSGI_APPLICATION = "djangotweet.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE selects "sqlite" (default), "postgresql" or "mysql". Server
+# databases read DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT.
+
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {},
+        }
+    }
+    if os.environ.get("DB_SQLITE_TUNING", "1") == "1":
+        # WAL lets readers run while one writer commits; IMMEDIATE takes the
+        # write lock at BEGIN so concurrent writers wait out the busy timeout
+        # instead of failing on lock upgrade. init_command and
+        # transaction_mode need Django 5.1+ (see requirements.txt).
+        DATABASES["default"]["OPTIONS"] = {
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA temp_store=MEMORY;"
+                "PRAGMA cache_size=-20000;"
+            ),
+            "timeout": float(os.environ.get("DB_BUSY_TIMEOUT", "20")),
+            "transaction_mode": "IMMEDIATE",
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": f"django.db.backends.{DB_ENGINE}",
+            "NAME": os.environ.get("DB_NAME", "djangotweet"),
+            "USER": os.environ.get("DB_USER", ""),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", ""),
+            "PORT": os.environ.get("DB_PORT", ""),
+            "OPTIONS": {},
+        }
+    }
+    if DB_ENGINE == "postgresql" and os.environ.get("DB_POOL_SIZE"):
+        # psycopg's pool (Django 5.1+) replaces persistent connections (CONN_MAX_AGE must be 0).
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": 1,
+            "max_size": int(os.environ["DB_POOL_SIZE"]),
+        }
+
+DATABASES["default"]["CONN_MAX_AGE"] = (
+    0 if "pool" in DATABASES["default"]["OPTIONS"]
+    else int(os.environ.get("DB_CONN_MAX_AGE", "60"))
+)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+
+# Cache
+# Set TWEETAPP_CACHE_BACKEND to "locmem" (default), "file", "redis" or a full
+# backend path. locmem is per process: invalidation in one worker does not
+# reach the others, so anything running more than one process needs a shared
+# backend, e.g. TWEETAPP_CACHE_BACKEND=redis with
+# TWEETAPP_CACHE_LOCATION=redis://127.0.0.1:6379 (requires the redis package).
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_BACKEND = os.environ.get("TWEETAPP_CACHE_BACKEND", "locmem")
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        "LOCATION": os.environ.get(
+            "TWEETAPP_CACHE_LOCATION",
+            str(BASE_DIR / ".cache") if CACHE_BACKEND == "file" else "tweetapp",
+        ),
+        "TIMEOUT": int(os.environ.get("TWEETAPP_CACHE_TIMEOUT", "300")),
     }
 }
 
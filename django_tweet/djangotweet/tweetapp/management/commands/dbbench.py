@@ -0,0 +1,83 @@
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from tweetapp.models import Tweet
+from tweetapp.pagination import paginate
+
+
+def percentiles(latencies):
+    if len(latencies) < 2:
+        return {}
+    cuts = statistics.quantiles(latencies, n=100)
+    return {"p50": cuts[49] * 1000, "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
+
+
+class Command(BaseCommand):
+    help = "Measure Tweet write and timeline read throughput under parallel clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--keep", action="store_true", help="keep the benchmark tweets afterwards")
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username="dbbench")
+        stop = threading.Event()
+        lock = threading.Lock()
+        latencies = {"write": [], "read": []}
+        errors = {"write": 0, "read": 0}
+
+        def client(kind, action):
+            mine = []
+            failed = 0
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        action()
+                    except OperationalError:
+                        failed += 1
+                        continue
+                    mine.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+                with lock:
+                    latencies[kind].extend(mine)
+                    errors[kind] += failed
+
+        def write():
+            Tweet.objects.create(username=user, message="benchmark tweet")
+
+        def read():
+            paginate(Tweet.objects.select_related("username"), None, 20)
+
+        threads = [threading.Thread(target=client, args=("write", write)) for _ in range(options["writers"])]
+        threads += [threading.Thread(target=client, args=("read", read)) for _ in range(options["readers"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options["duration"])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with connection.cursor() as cursor:
+            journal = None
+            if connection.vendor == "sqlite":
+                journal = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        self.stdout.write(f"{connection.vendor} ({journal or 'n/a'} journal), "
+                          f"{options['writers']} writers / {options['readers']} readers, {elapsed:.1f}s")
+        for kind in ("write", "read"):
+            done = len(latencies[kind])
+            timing = ", ".join(f"{k} {v:.1f}ms" for k, v in percentiles(latencies[kind]).items())
+            self.stdout.write(f"{kind:>5}: {done / elapsed:8.1f}/s  {done} ok, {errors[kind]} errors  {timing}")
+
+        if not options["keep"]:
+            user.delete()
@@ -0,0 +1,76 @@
+import itertools
+import random
+import statistics
+import string
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tweetapp.models import Tweet
+from tweetapp.search import search
+
+VOCABULARY_SIZE = 5000
+WORD_RANKS = [1, 10, 100, 1000, 4000]
+
+
+def vocabulary(rng):
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))))
+    return sorted(words)
+
+
+def median_ms(action, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = "Compare FTS5 search latency with a LIKE scan, filling the Tweet table with synthetic rows first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="make sure at least this many tweets exist")
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        words = vocabulary(rng)
+        # Zipf-like weights so the benchmark has both common and rare terms.
+        cum_weights = list(itertools.accumulate(1.0 / rank for rank in range(1, len(words) + 1)))
+
+        missing = options["rows"] - Tweet.objects.count()
+        if missing > 0:
+            user, _ = User.objects.get_or_create(username="searchbench")
+            started = time.perf_counter()
+            for start in range(0, missing, options["batch_size"]):
+                size = min(options["batch_size"], missing - start)
+                batch = []
+                for _ in range(size):
+                    message = " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(4, 12)))
+                    batch.append(Tweet(username=user, message=message[:100]))
+                with transaction.atomic():
+                    Tweet.objects.bulk_create(batch)
+                done = start + size
+                self.stderr.write(f"\rinserted {done} rows ({done / (time.perf_counter() - started):,.0f} rows/s)",
+                                  ending="")
+            self.stderr.write("")
+
+        total = Tweet.objects.count()
+        self.stdout.write(f"{total} tweets, median of {options['repeat']} runs, first page of 20")
+        self.stdout.write(f"{'term':<12} {'rank':>5} {'fts ms':>9} {'like ms':>9} {'speedup':>8}")
+        for rank in WORD_RANKS:
+            term = words[rank - 1]
+            fts = median_ms(lambda: search(term), options["repeat"])
+            like = median_ms(
+                lambda: list(Tweet.objects.select_related("username").filter(message__icontains=term)[:20]),
+                options["repeat"],
+            )
+            self.stdout.write(f"{term:<12} {rank:>5} {fts:>9.2f} {like:>9.2f} {like / fts:>7.1f}x")
@@ -0,0 +1,121 @@
+import asyncio
+import http.cookiejar
+import re
+import resource
+import statistics
+import time
+import urllib.parse
+import urllib.request
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold many idle SSE connections to /api/stream/ on a running ASGI server "
+        "(e.g. uvicorn djangotweet.asgi:application) and time tweet fan-out to them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--clients", type=int, default=2000)
+        parser.add_argument("--tweets", type=int, default=10)
+        parser.add_argument("--interval", type=float, default=0.5, help="seconds between tweets")
+        parser.add_argument("--idle", type=float, default=5.0, help="seconds to hold idle connections first")
+        parser.add_argument("--connect-batch", type=int, default=200)
+        parser.add_argument("--server-pid", type=int, help="report this process's memory")
+
+    def handle(self, *args, **options):
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < options["clients"] + 100:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, options["clients"] + 100), hard))
+        User.objects.get_or_create(username="ssebench")
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        url = urllib.parse.urlsplit(options["url"])
+        received = {}
+        connected = 0
+
+        async def client():
+            nonlocal connected
+            reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+            writer.write(f"GET /api/stream/ HTTP/1.1\r\nHost: {url.netloc}\r\n"
+                         "Accept: text/event-stream\r\n\r\n".encode())
+            await writer.drain()
+            status = await reader.readline()
+            if b" 200 " not in status:
+                raise CommandError(f"stream returned {status.decode().strip()}")
+            connected += 1
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        return
+                    match = re.search(rb"ssebench (\d+) ([\d.]+)", line)
+                    if match:
+                        received.setdefault(int(match.group(1)), []).append(time.time() - float(match.group(2)))
+            finally:
+                writer.close()
+
+        self.stdout.write(f"connecting {options['clients']} clients to {options['url']}")
+        started = time.perf_counter()
+        tasks = []
+        for start in range(0, options["clients"], options["connect_batch"]):
+            batch = min(options["connect_batch"], options["clients"] - start)
+            tasks += [asyncio.create_task(client()) for _ in range(batch)]
+            while connected < len(tasks):
+                failed = [t for t in tasks if t.done() and t.exception()]
+                if failed:
+                    raise failed[0].exception()
+                await asyncio.sleep(0.01)
+        self.stdout.write(f"{connected} connected in {time.perf_counter() - started:.1f}s")
+
+        await asyncio.sleep(options["idle"])
+        if options["server_pid"]:
+            self.stdout.write(f"server RSS with {connected} idle clients: {rss_mb(options['server_pid']):.0f} MB")
+
+        post = self.tweet_poster(options["url"])
+        for seq in range(options["tweets"]):
+            await asyncio.to_thread(post, f"ssebench {seq} {time.time():.6f}")
+            await asyncio.sleep(options["interval"])
+        await asyncio.sleep(2)
+        for task in tasks:
+            task.cancel()
+
+        latencies = [latency for values in received.values() for latency in values]
+        expected = options["tweets"] * connected
+        self.stdout.write(f"delivered {len(latencies)}/{expected} events")
+        if len(latencies) > 1:
+            cuts = statistics.quantiles(latencies, n=100)
+            self.stdout.write(f"fan-out latency p50 {cuts[49] * 1000:.1f}ms  p95 {cuts[94] * 1000:.1f}ms"
+                              f"  p99 {cuts[98] * 1000:.1f}ms  max {max(latencies) * 1000:.1f}ms")
+
+    def tweet_poster(self, base_url):
+        jar = http.cookiejar.CookieJar()
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+        form_url = f"{base_url}/addtweetbyform"
+        page = opener.open(form_url).read().decode()
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page).group(1)
+
+        def post(message):
+            data = urllib.parse.urlencode({
+                "csrfmiddlewaretoken": token,
+                "nickname_input": "ssebench",
+                "message_input": message,
+            }).encode()
+            opener.open(form_url, data=data).read()
+
+        return post
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# FTS5 index over Tweet.message, kept in sync by triggers so bulk_create and
+# queryset deletes are covered too. SQLite drops these triggers if a later
+# migration rebuilds tweetapp_tweet, so such a migration must recreate them.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE tweetapp_tweet_fts USING fts5(
+        message, content='tweetapp_tweet', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER tweetapp_tweet_fts_insert AFTER INSERT ON tweetapp_tweet BEGIN
+        INSERT INTO tweetapp_tweet_fts(rowid, message) VALUES (new.id, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER tweetapp_tweet_fts_delete AFTER DELETE ON tweetapp_tweet BEGIN
+        INSERT INTO tweetapp_tweet_fts(tweetapp_tweet_fts, rowid, message)
+        VALUES ('delete', old.id, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER tweetapp_tweet_fts_update AFTER UPDATE OF message ON tweetapp_tweet BEGIN
+        INSERT INTO tweetapp_tweet_fts(tweetapp_tweet_fts, rowid, message)
+        VALUES ('delete', old.id, old.message);
+        INSERT INTO tweetapp_tweet_fts(rowid, message) VALUES (new.id, new.message);
+    END
+    """,
+    "INSERT INTO tweetapp_tweet_fts(tweetapp_tweet_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS tweetapp_tweet_fts_insert",
+    "DROP TRIGGER IF EXISTS tweetapp_tweet_fts_delete",
+    "DROP TRIGGER IF EXISTS tweetapp_tweet_fts_update",
+    "DROP TABLE IF EXISTS tweetapp_tweet_fts",
+]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "sqlite":
+            for sql in statements:
+                schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tweetapp", "0003_tweet_created_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
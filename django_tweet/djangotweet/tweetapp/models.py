@@ -1,10 +1,18 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 # Create your models here.
 
 class Tweet(models.Model):
     username = models.ForeignKey(User,on_delete=models.CASCADE, null=True)
     message = models.CharField(max_length=100)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="tweet_newest_first_idx"),
+        ]
 
     def __str__(self):
-        return f"Tweet nick: {self.username} message: {self.message}"
\ No newline at end of file
+        return f"Tweet nick: {self.username} message: {self.message}"
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tweetapp import push, timeline
+from tweetapp.api import serialize
+from tweetapp.models import Tweet
+
+
+@receiver(post_save, sender=Tweet)
+def tweet_saved(sender, instance, created, **kwargs):
+    # Invalidate after commit: dropping the keys earlier lets a concurrent
+    # request cache the pre-commit rows again until the timeout.
+    if created:
+        message = serialize(instance)
+        transaction.on_commit(lambda: timeline.tweets_added([instance]))
+        transaction.on_commit(lambda: push.broker.publish(message))
+    else:
+        transaction.on_commit(lambda: timeline.tweets_deleted([instance.id]))
+
+
+@receiver(post_delete, sender=Tweet)
+def tweet_deleted(sender, instance, **kwargs):
+    tweet_id = instance.id
+    transaction.on_commit(lambda: timeline.tweets_deleted([tweet_id]))
@@ -1,3 +1,408 @@
+import asyncio
+import gc
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tweetapp import push
+from tweetapp.models import Tweet
+from tweetapp.views import TWEETS_PER_PAGE
+
+# Session, user and the tweet page itself; the count must not grow with the page size.
+LISTTWEET_QUERY_BUDGET = 3
+
+
+class ListTweetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f"user{i}", password="pw") for i in range(3)]
+        now = timezone.now()
+        Tweet.objects.bulk_create([
+            Tweet(username=cls.users[i % 3], message=f"tweet {i}", created_at=now - timedelta(minutes=i // 2))
+            for i in range(TWEETS_PER_PAGE * 2 + 5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def walk_pages(self):
+        seen = []
+        url = reverse("tweetapp:listtweet")
+        while url:
+            response = self.client.get(url)
+            seen.extend(tweet.id for tweet in response.context["tweets"])
+            cursor = response.context["next_cursor"]
+            url = f"{reverse('tweetapp:listtweet')}?cursor={cursor}" if cursor else None
+        return seen
+
+    def test_pages_cover_all_tweets_newest_first(self):
+        expected = list(Tweet.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(self.walk_pages(), expected)
+
+    def test_page_size(self):
+        response = self.client.get(reverse("tweetapp:listtweet"))
+        self.assertEqual(len(response.context["tweets"]), TWEETS_PER_PAGE)
+
+    def test_query_budget_anonymous(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("tweetapp:listtweet"))
+        self.assertLessEqual(len(queries), LISTTWEET_QUERY_BUDGET)
+
+    def test_query_budget_logged_in(self):
+        self.client.force_login(self.users[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("tweetapp:listtweet"))
+        self.assertLessEqual(len(queries), LISTTWEET_QUERY_BUDGET)
+        own = sum(tweet.username_id == self.users[0].id for tweet in response.context["tweets"])
+        self.assertContains(response, ">Delete</a>", count=own)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("tweetapp:listtweet"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TimelineCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="pw")
+        cls.bob = User.objects.create_user("bob", password="pw", is_staff=True)
+        Tweet.objects.create(username=cls.alice, message="from alice")
+        Tweet.objects.create(username=cls.bob, message="from bob")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_page_is_cached(self):
+        self.assertEqual(self.client.get(reverse("tweetapp:listtweet"))["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("tweetapp:listtweet"))
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertContains(response, "from alice")
+
+    def test_delete_button_with_cached_cards(self):
+        self.client.get(reverse("tweetapp:listtweet"))
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse("tweetapp:listtweet"))
+        alice_tweet = Tweet.objects.get(message="from alice")
+        bob_tweet = Tweet.objects.get(message="from bob")
+        self.assertContains(response, reverse("tweetapp:deletetweet", args=[alice_tweet.id]))
+        self.assertNotContains(response, reverse("tweetapp:deletetweet", args=[bob_tweet.id]))
+
+    def test_addtweet_invalidates_first_page(self):
+        self.client.get(reverse("tweetapp:listtweet"))
+        self.client.force_login(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("tweetapp:addtweet"), {"message": "fresh tweet"})
+        self.client.logout()
+        response = self.client.get(reverse("tweetapp:listtweet"))
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertContains(response, "fresh tweet")
+
+    def test_addtweetbyform_invalidates(self):
+        self.client.get(reverse("tweetapp:listtweet"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("tweetapp:addtweetbyform"),
+                             {"nickname_input": "bob", "message_input": "by form"})
+        self.assertContains(self.client.get(reverse("tweetapp:listtweet")), "by form")
+
+    def test_addtweetbymodelform_invalidates(self):
+        self.client.get(reverse("tweetapp:listtweet"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("tweetapp:addtweetbymodelform"),
+                             {"username": self.alice.id, "message": "by model form"})
+        self.assertContains(self.client.get(reverse("tweetapp:listtweet")), "by model form")
+
+    def test_deletetweet_invalidates(self):
+        self.client.get(reverse("tweetapp:listtweet"))
+        tweet = Tweet.objects.get(message="from alice")
+        self.client.force_login(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("tweetapp:deletetweet", args=[tweet.id]))
+        self.client.logout()
+        self.assertNotContains(self.client.get(reverse("tweetapp:listtweet")), "from alice")
+
+    def test_invalidation_waits_for_commit(self):
+        self.client.get(reverse("tweetapp:listtweet"))
+        with self.captureOnCommitCallbacks() as callbacks:
+            Tweet.objects.create(username=self.bob, message="not committed yet")
+            self.assertEqual(self.client.get(reverse("tweetapp:listtweet"))["X-Cache"], "HIT")
+        for callback in callbacks:
+            callback()
+        self.assertContains(self.client.get(reverse("tweetapp:listtweet")), "not committed yet")
+
+    def test_cachestats_reports_hit_ratio(self):
+        self.client.get(reverse("tweetapp:listtweet"))
+        self.client.get(reverse("tweetapp:listtweet"))
+        self.client.force_login(self.bob)
+        stats = self.client.get(reverse("tweetapp:cachestats")).json()
+        self.assertEqual(stats["page"], {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+        self.assertEqual(stats["card"]["misses"], 2)
+
+
+class TweetApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="pw")
+        cls.bob = User.objects.create_user("bob", password="pw")
+        for i in range(5):
+            Tweet.objects.create(username=cls.alice if i % 2 else cls.bob, message=f"tweet {i}")
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("tweetapp:api_tweets")
+
+    def post_json(self, data, method="post", **headers):
+        return getattr(self.client, method)(self.url, json.dumps(data),
+                                            content_type="application/json", headers=headers)
+
+    def test_cursor_listing(self):
+        first = self.client.get(self.url, {"limit": 3}).json()
+        second = self.client.get(self.url, {"limit": 3, "cursor": first["next_cursor"]}).json()
+        self.assertEqual(len(first["results"]), 3)
+        self.assertIsNone(second["next_cursor"])
+        ids = [t["id"] for t in first["results"] + second["results"]]
+        self.assertEqual(ids, list(Tweet.objects.values_list("id", flat=True)))
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        # The tag comes from indexed queries, not from this process's cache.
+        cache.clear()
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(self.url, headers={"if-none-match": etag}).status_code, 304)
+        Tweet.objects.create(username=self.alice, message="new")
+        self.assertEqual(self.client.get(self.url, headers={"if-none-match": etag}).status_code, 200)
+        etag = self.client.get(self.url)["ETag"]
+        Tweet.objects.filter(username=self.bob).first().delete()
+        self.assertEqual(self.client.get(self.url, headers={"if-none-match": etag}).status_code, 200)
+
+    def test_bulk_create_in_one_insert(self):
+        self.client.force_login(self.alice)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_json({"tweets": [{"message": f"bulk {i}"} for i in range(50)]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sum(q["sql"].startswith("INSERT") for q in queries), 1)
+        self.assertEqual(Tweet.objects.filter(message__startswith="bulk", username=self.alice).count(), 50)
+
+    def test_bulk_create_is_all_or_nothing(self):
+        self.client.force_login(self.alice)
+        response = self.post_json([{"message": "ok"}, {"message": "x" * 101}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Tweet.objects.filter(message="ok").exists())
+
+    def test_bulk_create_requires_login(self):
+        self.assertEqual(self.post_json([{"message": "hi"}]).status_code, 401)
+
+    def test_bulk_delete_only_touches_own_tweets(self):
+        self.client.force_login(self.alice)
+        response = self.post_json({"ids": list(Tweet.objects.values_list("id", flat=True))}, method="delete")
+        self.assertEqual(response.json(), {"deleted": 2})
+        self.assertFalse(Tweet.objects.filter(username=self.alice).exists())
+        self.assertEqual(Tweet.objects.filter(username=self.bob).count(), 3)
+
+    def test_bulk_delete_if_match(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.force_login(self.alice)
+        Tweet.objects.create(username=self.bob, message="meanwhile")
+        stale = self.post_json({"before": timezone.now().isoformat()}, method="delete", **{"if-match": etag})
+        self.assertEqual(stale.status_code, 412)
+        etag = self.client.get(self.url)["ETag"]
+        fresh = self.post_json({"before": timezone.now().isoformat()}, method="delete", **{"if-match": etag})
+        self.assertEqual(fresh.json(), {"deleted": 2})
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="pw")
+        Tweet.objects.bulk_create([
+            Tweet(username=cls.alice, message="django tips and more django tricks"),
+            Tweet(username=cls.alice, message="a note about django"),
+            Tweet(username=cls.alice, message="nothing to see here"),
+            Tweet(username=cls.alice, message="Café culture"),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def api(self, **params):
+        return self.client.get(reverse("tweetapp:api_search"), params).json()
+
+    def test_ranked_matches(self):
+        messages = [t["message"] for t in self.api(q="django")["results"]]
+        self.assertEqual(messages[0], "django tips and more django tricks")
+        self.assertEqual(len(messages), 2)
+
+    def test_prefix_and_diacritics(self):
+        self.assertEqual(len(self.api(q="djan*")["results"]), 2)
+        self.assertEqual(self.api(q="djan")["results"], [])
+        self.assertEqual(self.api(q="cafe")["results"][0]["message"], "Café culture")
+
+    def test_index_follows_creates_and_deletes(self):
+        tweet = Tweet.objects.create(username=self.alice, message="fresh django news")
+        self.assertEqual(len(self.api(q="django")["results"]), 3)
+        Tweet.objects.filter(message__startswith="a note").delete()
+        tweet.delete()
+        self.assertEqual(len(self.api(q="django")["results"]), 1)
+
+    def test_pagination(self):
+        Tweet.objects.bulk_create([Tweet(username=self.alice, message=f"paged {i}") for i in range(25)])
+        first = self.api(q="paged")
+        second = self.api(q="paged", page=first["next_page"])
+        self.assertEqual(len(first["results"]) + len(second["results"]), 25)
+        self.assertIsNone(second["next_page"])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.api(q='django" OR NOT (')["results"], [])
+        self.assertEqual(self.client.get(reverse("tweetapp:api_search"), {"q": ""}).status_code, 400)
+
+    def test_search_page(self):
+        response = self.client.get(reverse("tweetapp:searchtweet"), {"q": "note"})
+        self.assertContains(response, "a note about django")
+        self.assertNotContains(response, "nothing to see here")
+
+
+class StreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="pw")
+        cls.old = Tweet.objects.create(username=cls.alice, message="before connecting")
+        cls.missed = Tweet.objects.create(username=cls.alice, message="missed while away")
+
+    async def read_event(self, content):
+        chunk = await asyncio.wait_for(anext(content), timeout=5)
+        return chunk.decode() if isinstance(chunk, bytes) else chunk
+
+    async def test_new_tweets_are_pushed(self):
+        response = await self.async_client.get(reverse("tweetapp:api_stream"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content = response.streaming_content
+        first = asyncio.ensure_future(self.read_event(content))
+        while not push.broker._subscribers:  # the stream subscribes on first read
+            await asyncio.sleep(0.001)
+        push.broker.publish({"id": 999, "username": "alice", "message": "live"})
+        event = await first
+        self.assertIn("id: 999", event)
+        self.assertIn('"message": "live"', event)
+        await content.aclose()
+
+    async def test_last_event_id_replays_missed_tweets(self):
+        response = await self.async_client.get(reverse("tweetapp:api_stream"),
+                                                headers={"Last-Event-ID": str(self.old.id)})
+        content = response.streaming_content
+        self.assertIn("missed while away", await self.read_event(content))
+        await content.aclose()
+        # Django's wrapper does not close the view's generator; dropping the
+        # response lets the event loop finalize it.
+        del response, content
+        gc.collect()
+        await asyncio.sleep(0.01)
+        self.assertFalse(push.broker._subscribers)
+
+    async def test_unread_stream_does_not_subscribe(self):
+        await self.async_client.get(reverse("tweetapp:api_stream"))
+        self.assertFalse(push.broker._subscribers)
+
+    def test_slow_subscriber_is_bounded(self):
+        async def run():
+            subscriber = push.broker.subscribe(maxsize=3)
+            try:
+                for i in range(10):
+                    subscriber.put({"id": i})
+                return await subscriber.get(timeout=1)
+            finally:
+                push.broker.unsubscribe(subscriber)
+
+        messages, dropped = asyncio.run(run())
+        self.assertEqual([m["id"] for m in messages], [7, 8, 9])
+        self.assertEqual(dropped, 7)
+
+    def test_commit_publishes(self):
+        async def subscribe():
+            return push.broker.subscribe()
+
+        loop = asyncio.new_event_loop()
+        subscriber = loop.run_until_complete(subscribe())
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                Tweet.objects.create(username=self.alice, message="published")
+            messages, _ = loop.run_until_complete(subscriber.get(timeout=1))
+        finally:
+            push.broker.unsubscribe(subscriber)
+            loop.close()
+        self.assertEqual([m["message"] for m in messages], ["published"])
+
+
+class TweetIoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="pw")
+        for i in range(7):
+            Tweet.objects.create(username=cls.alice, message=f"tweet {i}, with \"quotes\"")
+        Tweet.objects.create(username=None, message="user was deleted")
+
+    def roundtrip(self, suffix):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"tweets.{suffix}")
+            call_command("exporttweets", path, chunk_size=3, stderr=io.StringIO())
+            before = list(Tweet.objects.order_by("id").values_list("username", "message", "created_at"))
+            Tweet.objects.all().delete()
+            call_command("importtweets", path, batch_size=3, stderr=io.StringIO())
+        after = list(Tweet.objects.order_by("id").values_list("username", "message", "created_at"))
+        self.assertEqual(after, before)
+
+    def test_ndjson_roundtrip(self):
+        self.roundtrip("ndjson")
+
+    def test_csv_roundtrip(self):
+        self.roundtrip("csv")
+
+    def test_unknown_users(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tweets.ndjson")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"username": "carol", "message": "hello"}) + "\n")
+                f.write(json.dumps({"username": "alice", "message": "x" * 101}) + "\n")
+            stderr = io.StringIO()
+            call_command("importtweets", path, stderr=stderr)
+            self.assertIn("skipped 2 rows", stderr.getvalue())
+            call_command("importtweets", path, create_users=True, stderr=io.StringIO())
+        self.assertTrue(Tweet.objects.filter(username__username="carol", message="hello").exists())
+
+    def test_malformed_rows_are_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tweets.ndjson")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("not json\n[]\n\"x\"\n")
+                f.write(json.dumps({"username": "alice", "message": "bad date", "created_at": "2024-13-45T00:00:00"}) + "\n")
+                f.write(json.dumps({"username": "alice", "message": 42}) + "\n")
+                f.write(json.dumps({"username": ["alice"], "message": "list user"}) + "\n")
+                f.write(json.dumps({"username": "alice", "message": "kept"}) + "\n")
+            stderr = io.StringIO()
+            call_command("importtweets", path, batch_size=3, stderr=stderr)
+        self.assertIn("skipped 6 ", stderr.getvalue())
+        self.assertTrue(Tweet.objects.filter(message="kept").exists())
+        self.assertFalse(Tweet.objects.filter(message="bad date").exists())
 
-# Create your tests here.
+    def test_import_batches_queries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tweets.csv")
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                f.write("username,message,created_at\n")
+                f.writelines(f"alice,bulk {i},\n" for i in range(100))
+            with CaptureQueriesContext(connection) as queries:
+                call_command("importtweets", path, batch_size=50, stderr=io.StringIO())
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(Tweet.objects.filter(message__startswith="bulk").count(), 100)
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+
+from importantPackge.downloader import DownloadManager, Job
+
+
+def read_queue(path):
+    """One `url [sha256]` per line; blank lines and # comments are skipped."""
+    with open(path, encoding="utf-8") as f:
+        return [line.split() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def show(job):
+    if job.error:
+        print(f"{job.name or job.url}: failed after {job.retries} retries: {job.error}", file=sys.stderr)
+        return
+    percent = f"{job.done / job.total:6.1%}" if job.total else f"{job.done:>10} B"
+    state = "done" if job.finished else "    "
+    print(f"{state} {job.name:<40} {percent}  {job.rate / 1e6:7.2f} MB/s  {job.elapsed:6.1f}s"
+          f"{f'  retries {job.retries}' if job.retries else ''}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m importantPackge",
+                                     description="Download videos and files in parallel, resuming partial files.")
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("-i", "--input", help="queue file with one `url [sha256]` per line")
+    parser.add_argument("-o", "--output", default=".", help="directory to save into")
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=5)
+    args = parser.parse_args()
+
+    queue = [[url] for url in args.urls] + (read_queue(args.input) if args.input else [])
+    if not queue:
+        queue = [[input("enter video url: ")]]
+        args.output = input("enter video path: ") or args.output
+
+    manager = DownloadManager(workers=args.workers, retries=args.retries, on_progress=show)
+    # The trailing separator makes -o a directory even before it exists.
+    output = os.path.join(args.output, "")
+    jobs = manager.download(Job(entry[0], output, *entry[1:2]) for entry in queue)
+    failed = [job for job in jobs if job.error]
+    total = sum(job.done - job.resumed_from for job in jobs)
+    elapsed = max(job.finished for job in jobs) - min(job.started for job in jobs)
+    print(f"{len(jobs) - len(failed)}/{len(jobs)} downloaded, {total / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({total / 1e6 / elapsed if elapsed else 0:.2f} MB/s)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
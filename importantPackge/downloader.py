@@ -0,0 +1,214 @@
+import hashlib
+import http.client
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1 << 20
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class DownloadError(Exception):
+    pass
+
+
+class Job:
+    """One file to fetch. `path` is a directory if it exists as one or ends
+    with a separator; the file name then comes from the URL (or the YouTube
+    stream)."""
+
+    def __init__(self, url, path=".", sha256=None):
+        self.url = url
+        self.path = path
+        self.sha256 = sha256
+        self.media_url = url
+        self.done = 0
+        self.total = None
+        self.resumed_from = 0
+        self.retries = 0
+        self.started = None
+        self.finished = None
+        self.error = None
+        self._reported = 0.0
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def directory(self):
+        return self.path.endswith((os.sep, "/")) or os.path.isdir(self.path)
+
+    @property
+    def elapsed(self):
+        return ((self.finished or time.perf_counter()) - self.started) if self.started else 0.0
+
+    @property
+    def rate(self):
+        """Bytes per second transferred by this run, not counting resumed bytes."""
+        return (self.done - self.resumed_from) / self.elapsed if self.elapsed else 0.0
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_youtube(url):
+    return urllib.parse.urlsplit(url).hostname in {"youtube.com", "www.youtube.com", "m.youtube.com", "youtu.be"}
+
+
+def resolve_youtube(job):
+    import pytube
+
+    stream = pytube.YouTube(job.url).streams.get_highest_resolution()
+    job.media_url = stream.url
+    job.total = stream.filesize
+    if job.directory:
+        job.path = os.path.join(job.path, stream.default_filename)
+
+
+class DownloadManager:
+    """Downloads jobs on a bounded thread pool.
+
+    Each file is streamed to `<path>.part` in CHUNK_SIZE reads. After a
+    dropped connection or a retryable status it resumes with a Range
+    request from the bytes already on disk, backing off exponentially; a
+    server that ignores Range restarts the file. A finished file is checked
+    against the expected size and sha256 before it is renamed into place,
+    so an existing `<path>` is complete and is skipped on a rerun (after
+    checking it against the job's sha256, if it has one).
+    """
+
+    def __init__(self, workers=4, chunk_size=CHUNK_SIZE, retries=5, backoff=0.5, timeout=30.0,
+                 on_progress=None, progress_interval=0.5):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._claimed = set()
+
+    def download(self, jobs):
+        """Runs every job and returns them; failed ones have `error` set."""
+        jobs = list(jobs)
+        self._claimed.clear()
+        with ThreadPoolExecutor(self.workers) as pool:
+            list(pool.map(self._run, jobs))
+        return jobs
+
+    def _run(self, job):
+        job.started = time.perf_counter()
+        try:
+            if is_youtube(job.url):
+                resolve_youtube(job)
+            elif job.directory:
+                name = urllib.parse.unquote(os.path.basename(urllib.parse.urlsplit(job.url).path))
+                job.path = os.path.join(job.path, name or "download")
+            self._claim(job)
+            os.makedirs(os.path.dirname(job.path) or ".", exist_ok=True)
+            self._fetch(job)
+        except Exception as exc:
+            job.error = exc
+        finally:
+            job.finished = time.perf_counter()
+            self._report(job, force=True)
+
+    def _claim(self, job):
+        """Refuses a second job for the same file, which would interleave writes to one .part."""
+        path = os.path.realpath(job.path)
+        with self._lock:
+            if path in self._claimed:
+                raise DownloadError(f"{job.url}: {job.path} is already the target of another job")
+            self._claimed.add(path)
+
+    def _fetch(self, job):
+        part = job.path + ".part"
+        if os.path.exists(job.path) and not os.path.exists(part):
+            if job.sha256 and _sha256(job.path) != job.sha256.lower():
+                raise DownloadError(f"{job.name}: existing file does not match sha256; remove it to download again")
+            job.done = job.total = os.path.getsize(job.path)
+            return
+        if os.path.exists(part):
+            job.resumed_from = os.path.getsize(part)
+        for attempt in range(self.retries + 1):
+            try:
+                self._transfer(job, part)
+                self._verify(job, part)
+                os.replace(part, job.path)
+                return
+            except urllib.error.HTTPError as exc:
+                if exc.code not in RETRY_STATUSES:
+                    raise DownloadError(f"{job.media_url} returned {exc.code}") from exc
+                error = exc
+            except (OSError, http.client.HTTPException, DownloadError) as exc:
+                error = exc
+            if attempt == self.retries:
+                raise DownloadError(f"{job.name}: giving up after {self.retries} retries: {error}") from error
+            job.retries += 1
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def _transfer(self, job, part):
+        have = os.path.getsize(part) if os.path.exists(part) else 0
+        request = urllib.request.Request(job.media_url, headers={"Range": f"bytes={have}-"} if have else {})
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as exc:
+            if exc.code != 416:
+                raise
+            # Nothing left past `have`: either the part is already whole or the file shrank.
+            total = re.search(r"/(\d+)", exc.headers.get("Content-Range", ""))
+            job.total = int(total.group(1)) if total else job.total
+            if job.total != have:
+                os.remove(part)
+                raise DownloadError(f"{job.name}: partial file no longer matches the remote one")
+            job.done = have
+            return
+        with response:
+            if response.status == 206:
+                job.total = int(response.headers["Content-Range"].rsplit("/", 1)[1])
+                mode = "ab"
+            else:
+                have = 0
+                length = response.headers.get("Content-Length")
+                job.total = int(length) if length else None
+                mode = "wb"
+            job.done = have
+            with open(part, mode) as f:
+                while chunk := response.read(self.chunk_size):
+                    f.write(chunk)
+                    job.done += len(chunk)
+                    self._report(job)
+        if job.total is not None and job.done < job.total:
+            raise DownloadError(f"{job.name}: connection closed at {job.done}/{job.total} bytes")
+
+    def _verify(self, job, part):
+        size = os.path.getsize(part)
+        if job.total is not None and size != job.total:
+            os.remove(part)
+            raise DownloadError(f"{job.name}: size {size} != {job.total}")
+        if job.sha256:
+            if _sha256(part) != job.sha256.lower():
+                os.remove(part)
+                raise DownloadError(f"{job.name}: sha256 mismatch")
+
+    def _report(self, job, force=False):
+        if not self.on_progress:
+            return
+        now = time.perf_counter()
+        if force or now - job._reported >= self.progress_interval:
+            job._reported = now
+            with self._lock:
+                self.on_progress(job)
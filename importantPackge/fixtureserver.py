@@ -0,0 +1,117 @@
+import argparse
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Faults:
+    """Misbehaviour to inject: `drop` is the chance a response is cut off
+    partway, `error` the chance of a 503, `rate` a per-connection cap in
+    bytes per second."""
+
+    def __init__(self, drop=0.0, error=0.0, rate=None, seed=None):
+        self.drop = drop
+        self.error = error
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.ranged = 0
+        self.dropped = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def roll(self, chance):
+        with self._lock:
+            return self.random.random() < chance
+
+
+def make_handler(root, faults):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            faults.requests += 1
+            path = os.path.join(root, urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).lstrip("/"))
+            if not os.path.isfile(path) or not os.path.realpath(path).startswith(os.path.realpath(root)):
+                return self.send_error(404)
+            if faults.roll(faults.error):
+                faults.errors += 1
+                return self.send_error(503)
+            size = os.path.getsize(path)
+            start, end = 0, size - 1
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2)), end) if match.group(2) else end
+                if start >= size:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    return self.end_headers()
+                faults.ranged += 1
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+
+            cut = start + faults.random.randrange(end - start + 1) if faults.roll(faults.drop) else None
+            try:
+                with open(path, "rb") as f:
+                    f.seek(start)
+                    position = start
+                    while position <= end:
+                        chunk = f.read(min(64 * 1024, end - position + 1))
+                        if cut is not None and position + len(chunk) > cut:
+                            faults.dropped += 1
+                            self.wfile.write(chunk[:cut - position])
+                            self.close_connection = True
+                            return
+                        self.wfile.write(chunk)
+                        position += len(chunk)
+                        if faults.rate:
+                            time.sleep(len(chunk) / faults.rate)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client went away
+
+    return Handler
+
+
+def serve(root, faults=None, host="127.0.0.1", port=0):
+    """Serves `root` in a background thread and returns the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(root, faults or Faults()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fixture media with Range support and injected faults.")
+    parser.add_argument("root", nargs="?", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--drop", type=float, default=0.0, help="chance a response is cut off partway")
+    parser.add_argument("--error", type=float, default=0.0, help="chance of answering 503")
+    parser.add_argument("--rate", type=float, help="bytes per second per connection")
+    args = parser.parse_args()
+
+    faults = Faults(args.drop, args.error, args.rate)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.root, faults))
+    print(f"serving {args.root} at http://127.0.0.1:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"{faults.requests} requests, {faults.ranged} ranged, {faults.dropped} dropped, {faults.errors} errors")
+
+
+if __name__ == "__main__":
+    main()
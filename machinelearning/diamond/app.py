@@ -1,18 +1,173 @@
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import os
+import time
+
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse
-import pickle
-import pandas as pd
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, PlainTextResponse
+import numpy as np
+from pydantic import BaseModel, ValidationError
+
+from approx import ApproxSVR
+from artifact import load_artifact
+from assets import REVALIDATE, AssetCache
+from batching import PredictionBatcher
+from cache import PredictionCache
+from fastencoding import FeatureEncoder
+from metrics import ERRORS, PROFILER, REGISTRY, STAGE_SECONDS, MetricsMiddleware
+from registry import ModelRegistry, ModelVersion
+from streaming import (
+    DuplexStreamingResponse,
+    format_csv,
+    format_ndjson,
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
+)
+from workers import Overloaded, WorkerPool
+
+
+FEATURES = ["carat", "cut", "color", "clarity", "depth", "table", "x", "y", "z"]
+BATCH_CHUNK_SIZE = int(os.environ.get("DIAMOND_BATCH_CHUNK_SIZE", "1024"))
+SCORING_MODE = os.environ.get("DIAMOND_SCORING_MODE", "exact")
+APPROX_PATH = os.environ.get("DIAMOND_APPROX_PATH")
+APPROX_MAX_R2_LOSS = float(os.environ.get("DIAMOND_APPROX_MAX_R2_LOSS", "0.005"))
+APPROX_MAX_ABS_ERROR = os.environ.get("DIAMOND_APPROX_MAX_ABS_ERROR")
+CACHE_SIZE = int(os.environ.get("DIAMOND_CACHE_SIZE", "10000"))
+CACHE_TTL = os.environ.get("DIAMOND_CACHE_TTL_SECONDS")
+CACHE_ROUND = os.environ.get("DIAMOND_CACHE_ROUND_DIGITS")
+MODEL_PATH = os.environ.get("DIAMOND_MODEL_PATH", "diamond_model")
+MODEL_POLL_SECONDS = float(os.environ.get("DIAMOND_MODEL_POLL_SECONDS", "5"))
+CANDIDATE_PERCENT = float(os.environ.get("DIAMOND_CANDIDATE_PERCENT", "0"))
+CANDIDATE_MODE = os.environ.get("DIAMOND_CANDIDATE_MODE", "canary")
+WORKERS = int(os.environ.get("DIAMOND_WORKERS", "0"))
+WORKER_QUEUE_DEPTH = int(os.environ.get("DIAMOND_WORKER_QUEUE_DEPTH", "256"))
+# Pending slots shadow scoring leaves free for live traffic; past that it is dropped.
+SHADOW_RESERVE = int(os.environ.get("DIAMOND_SHADOW_RESERVE", str(WORKER_QUEUE_DEPTH // 2)))
+PROFILER_ENABLED = os.environ.get("DIAMOND_PROFILER_ENABLED", "0") == "1"
+
+
+logger = logging.getLogger("diamond.app")
+
+
+def load_scorer(artifact):
+    """The exact model, or in approx mode a surrogate prebuilt with approx.py.
+
+    The artifact directory is treated as read-only: a missing, stale or
+    out-of-budget surrogate is not rebuilt here, the exact model is served
+    instead.
+    """
+    if SCORING_MODE == "exact" or artifact.manifest["model"]["type"] != "svr":
+        return artifact.model
+    if SCORING_MODE != "approx":
+        raise ValueError(f"Unknown DIAMOND_SCORING_MODE: {SCORING_MODE!r}")
+    max_abs_error = float(APPROX_MAX_ABS_ERROR) if APPROX_MAX_ABS_ERROR else None
+    approx_path = APPROX_PATH or os.path.join(artifact.path, "approx.npz")
+    if not os.path.exists(approx_path):
+        logger.warning("No surrogate at %s (build it with approx.py); serving the exact model", approx_path)
+        return artifact.model
+    surrogate = ApproxSVR.load(approx_path)
+    report = surrogate.report
+    if report.get("artifact") != artifact.checksum:
+        logger.warning("Surrogate %s was built for another artifact; serving the exact model", approx_path)
+        return artifact.model
+    within_r2 = 1.0 - report.get("r2_vs_exact", -np.inf) <= APPROX_MAX_R2_LOSS
+    within_err = max_abs_error is None or report.get("max_error_vs_exact", np.inf) <= max_abs_error
+    if not (within_r2 and within_err):
+        logger.warning("Surrogate %s misses the accuracy budget (r2 %.5f, max error %.1f); serving the exact model",
+                       approx_path, report.get("r2_vs_exact", float("nan")),
+                       report.get("max_error_vs_exact", float("nan")))
+        return artifact.model
+    return surrogate
+
+
+def load_version(name, path, fingerprint):
+    artifact = load_artifact(path)
+    encoder = FeatureEncoder(artifact.encoders, artifact.scaler, FEATURES)
+    return ModelVersion(name, path, artifact, encoder, load_scorer(artifact), fingerprint)
+
+
+prediction_cache = PredictionCache(
+    maxsize=CACHE_SIZE,
+    ttl=float(CACHE_TTL) if CACHE_TTL else None,
+    round_digits=int(CACHE_ROUND) if CACHE_ROUND else None,
+)
+
+registry = ModelRegistry(
+    MODEL_PATH,
+    load_version,
+    poll_interval=MODEL_POLL_SECONDS,
+    candidate_percent=CANDIDATE_PERCENT,
+    candidate_mode=CANDIDATE_MODE,
+)
+registry.listeners.append(
+    lambda version, previous: prediction_cache.set_version(f"{SCORING_MODE}:{version.id}")
+)
+registry.load_initial()
+shadow_tasks = set()
+
+assets = AssetCache()
+assets.add("/", "index.html", cache_control=REVALIDATE, watch=True)
+assets.add_directory("/static", "static")
+
+
+worker_pool = (
+    WorkerPool(WORKERS, WORKER_QUEUE_DEPTH, warm_spec=registry.live.spec) if WORKERS > 0 else None
+)
+
+
+def group_by_version(items):
+    groups = {}
+    for i, (version, _) in enumerate(items):
+        groups.setdefault(version, []).append(i)
+    return groups
+
+
+def predict_rows(items):
+    results = [None] * len(items)
+    for version, indices in group_by_version(items).items():
+        predictions = version.predict([items[i][1] for i in indices])
+        for i, prediction in zip(indices, predictions):
+            results[i] = prediction
+    return results
+
+
+async def predict_rows_in_pool(items):
+    results = [None] * len(items)
+    groups = group_by_version(items).items()
+    with STAGE_SECONDS.time("worker"):
+        outputs = await asyncio.gather(*(
+            worker_pool.run(version.spec, [items[i][1] for i in indices])
+            for version, indices in groups
+        ))
+    for (_, indices), predictions in zip(groups, outputs):
+        for i, prediction in zip(indices, predictions):
+            results[i] = prediction
+    return results
+
+
+batcher = PredictionBatcher(
+    predict_rows_in_pool if worker_pool else predict_rows,
+    max_batch_size=int(os.environ.get("DIAMOND_BATCH_MAX_SIZE", "32")),
+    max_wait_ms=float(os.environ.get("DIAMOND_BATCH_MAX_WAIT_MS", "2")),
+    max_concurrent=WORKERS if worker_pool else 1,
+)
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    await batcher.start()
+    await registry.start()
+    yield
+    await registry.stop()
+    await batcher.stop()
+    if worker_pool is not None:
+        worker_pool.shutdown()
 
-with open("diamond_model_complete.pkl", "rb") as f:
-    saved_data = pickle.load(f)
-    model = saved_data["model"]
-    encoders = saved_data["encoders"]
-    scaler = saved_data["scaler"]
 
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 
 class DiamondFeatures(BaseModel):
@@ -28,25 +183,192 @@ class DiamondFeatures(BaseModel):
 
 
 @app.post("/predict")
-async def predict(features: DiamondFeatures):
-    input_data = pd.DataFrame([features.model_dump()])
+async def predict(features: DiamondFeatures, request: Request):
+    STAGE_SECONDS.observe(time.perf_counter() - request.state.started, "parse_validate")
+    row = features.model_dump()
+    version, shadow = registry.route()
 
     try:
-        for col in ["cut", "color", "clarity"]:
-            input_data[col] = encoders[col].transform(input_data[col])
+        version.check(row)
     except ValueError as exc:
+        version.stats.record_error()
+        ERRORS.inc("/predict", "invalid_category")
         raise HTTPException(
             status_code=400,
             detail=f"Invalid value for category field: {exc}"
         ) from exc
 
-    input_scaled = scaler.transform(input_data)
-    prediction = model.predict(input_scaled)
+    try:
+        prediction = await score(version, row)
+    except Overloaded as exc:
+        ERRORS.inc("/predict", "overloaded")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server overloaded: {exc}",
+            headers={"Retry-After": "1"},
+        ) from exc
+    if shadow is not None:
+        task = asyncio.create_task(score_shadow(shadow, row))
+        shadow_tasks.add(task)
+        task.add_done_callback(shadow_tasks.discard)
+
+    return {"predicted_price": prediction}
+
+
+async def score(version, row, reserve=0):
+    start = time.perf_counter()
+    with STAGE_SECONDS.time("cache_lookup"):
+        key = (version.id, prediction_cache.key(row))
+        prediction = prediction_cache.get(key)
+    if prediction is None:
+        if worker_pool is not None:
+            worker_pool.acquire(reserve)
+        try:
+            with STAGE_SECONDS.time("batch"):
+                prediction = await batcher.submit((version, row))
+        finally:
+            if worker_pool is not None:
+                worker_pool.release()
+        prediction_cache.put(key, prediction)
+    version.stats.record(time.perf_counter() - start, prediction)
+    return prediction
+
+
+async def score_shadow(version, row):
+    try:
+        version.check(row)
+        await score(version, row, reserve=SHADOW_RESERVE)
+    except Overloaded:
+        pass
+    except Exception:
+        version.stats.record_error()
+
+
+async def score_stream(records, chunk_size, formatter):
+    version = registry.live
+    index = 0
+    chunk = []
+    async for record, error in records:
+        if error is None:
+            try:
+                row = DiamondFeatures.model_validate(record).model_dump()
+                version.check(row)
+            except ValidationError as exc:
+                error = "; ".join(
+                    f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()
+                )
+            except ValueError as exc:
+                error = f"Invalid value for category field: {exc}"
+        if error is not None:
+            ERRORS.inc("/predict/batch", "invalid_row")
+        chunk.append((index, None if error else row, error))
+        index += 1
+        if len(chunk) >= chunk_size:
+            yield await score_chunk(version, chunk, formatter)
+            chunk = []
+    if chunk:
+        yield await score_chunk(version, chunk, formatter)
+
+
+async def score_chunk(version, chunk, formatter):
+    rows = [row for _, row, error in chunk if error is None]
+    if not rows:
+        predictions = iter([])
+    elif worker_pool is not None:
+        # Chunks share the pending limit with /predict, so a large upload
+        # cannot queue unbounded work ahead of single predictions.
+        await worker_pool.acquire_wait()
+        try:
+            predictions = iter(await worker_pool.run(version.spec, rows))
+        finally:
+            worker_pool.release()
+    else:
+        predictions = iter(await asyncio.to_thread(version.predict, rows))
+    return "".join(
+        formatter(i, error=error) if error else formatter(i, next(predictions))
+        for i, _, error in chunk
+    )
 
-    return {"predicted_price": float(prediction[0])}
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request, chunk_size: int = BATCH_CHUNK_SIZE):
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+    if worker_pool is not None and worker_pool.full:
+        ERRORS.inc("/predict/batch", "overloaded")
+        worker_pool.rejected += 1
+        raise HTTPException(status_code=503, detail="Server overloaded", headers={"Retry-After": "1"})
+
+    content_type = request.headers.get("content-type", "")
+    lines = iter_lines(request.stream())
+    if "csv" in content_type:
+        records = iter_csv_records(lines)
+        formatter, media_type = format_csv, "text/csv"
+        header = format_csv("row", "predicted_price", "error")
+    else:
+        records = iter_ndjson_records(lines)
+        formatter, media_type = format_ndjson, "application/x-ndjson"
+        header = ""
+
+    async def body():
+        if header:
+            yield header
+        async for block in score_stream(records, chunk_size, formatter):
+            yield block
+
+    return DuplexStreamingResponse(body(), media_type=media_type)
+
+@app.get("/model/info")
+async def model_info():
+    info = {"scoring_mode": SCORING_MODE, **registry.info()}
+    for role in ("live", "candidate"):
+        version = getattr(registry, role)
+        if version is not None and isinstance(version.scorer, ApproxSVR):
+            info[role]["approx"] = version.scorer.report
+    return info
+
+@app.post("/model/reload")
+async def model_reload():
+    changed = await registry.refresh()
+    return {"changed": changed, "live": registry.live.id,
+            "candidate": registry.candidate.id if registry.candidate else None}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return prediction_cache.stats()
+
+@app.get("/predict/stats")
+async def predict_stats():
+    stats = batcher.stats()
+    if worker_pool is not None:
+        stats["workers"] = worker_pool.stats()
+    return stats
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/debug/profiler/start")
+async def profiler_start(interval_ms: float = 5.0):
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    PROFILER.start(interval=interval_ms / 1000.0)
+    return {"running": True, "interval_ms": interval_ms}
+
+@app.post("/debug/profiler/stop", response_class=PlainTextResponse)
+async def profiler_stop(limit: int = 200):
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    PROFILER.stop()
+    return PlainTextResponse(PROFILER.collapsed(limit))
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    with open("index.html", "r", encoding="utf-8") as f:
-        html = f.read()
-    return HTMLResponse(content=html)
\ No newline at end of file
+    return assets.response(request, "/")
+
+@app.get("/static/{path:path}")
+async def static_asset(path: str, request: Request):
+    url = f"/static/{path}"
+    if url not in assets:
+        raise HTTPException(status_code=404, detail="Not found")
+    return assets.response(request, url)
@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import max_error, r2_score
+
+from artifact import load_artifact, rbf_kernel
+
+LANDMARK_STEPS = [128, 256, 512, 1024, 2048, 4096]
+
+
+class ApproxSVR:
+    """Reduced-set surrogate of an RBF SVR: f(x) = K(x, landmarks) @ weights + intercept."""
+
+    def __init__(self, landmarks, weights, intercept, gamma, report=None, path=None):
+        self.landmarks = np.ascontiguousarray(landmarks, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.gamma = float(gamma)
+        self.report = report or {}
+        self.path = path
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return rbf_kernel(X, self.landmarks, self.gamma) @ self.weights + self.intercept
+
+    @property
+    def within_budget(self):
+        return bool(self.report.get("within_budget"))
+
+    def save(self, path):
+        # Written to a temp file and renamed so a reader never sees half a file.
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, landmarks=self.landmarks, weights=self.weights,
+                     intercept=self.intercept, gamma=self.gamma,
+                     report=json.dumps(self.report))
+        os.replace(tmp, path)
+        self.path = path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["landmarks"], data["weights"], float(data["intercept"]),
+                       float(data["gamma"]), json.loads(str(data["report"])), path)
+
+
+def fit_surrogate(model, n_landmarks, fit_X, fit_y, ridge=1e-6, random_state=0):
+    kmeans = MiniBatchKMeans(n_clusters=n_landmarks, random_state=random_state, n_init=3)
+    landmarks = kmeans.fit(np.asarray(model.support_vectors_)).cluster_centers_
+    intercept = float(model.intercept_[0])
+    K = rbf_kernel(fit_X, landmarks, model.gamma)
+    gram = K.T @ K
+    gram[np.diag_indices_from(gram)] += ridge * np.trace(gram) / len(gram)
+    weights = np.linalg.solve(gram, K.T @ (fit_y - intercept))
+    return ApproxSVR(landmarks, weights, intercept, model.gamma)
+
+
+def compare(exact, approx):
+    return {
+        "r2_vs_exact": float(r2_score(exact, approx)),
+        "max_error_vs_exact": float(max_error(exact, approx)),
+    }
+
+
+def build_surrogate(model, X_eval, max_r2_loss=0.005, max_abs_error=None,
+                    fit_size=8000, random_state=0):
+    """Returns the smallest surrogate within budget, else the largest one tried
+    (its report has within_budget False), or None when the model has too few
+    support vectors for a reduced set to help."""
+    rng = np.random.default_rng(random_state)
+    sv = model.support_vectors_
+    fit_X = sv[rng.choice(len(sv), size=min(fit_size, len(sv)), replace=False)]
+    fit_y = model.predict(fit_X)
+
+    start = time.perf_counter()
+    exact = model.predict(X_eval)
+    exact_seconds = time.perf_counter() - start
+
+    surrogate = None
+    for n_landmarks in LANDMARK_STEPS:
+        if n_landmarks >= len(sv):
+            break
+        surrogate = fit_surrogate(model, n_landmarks, fit_X, fit_y, random_state=random_state)
+        start = time.perf_counter()
+        approx = surrogate.predict(X_eval)
+        approx_seconds = time.perf_counter() - start
+        report = compare(exact, approx)
+        report.update({
+            "n_landmarks": n_landmarks,
+            "n_support_vectors": int(len(sv)),
+            "eval_rows": int(len(X_eval)),
+            "exact_seconds": exact_seconds,
+            "approx_seconds": approx_seconds,
+            "max_r2_loss": max_r2_loss,
+            "max_abs_error": max_abs_error,
+        })
+        surrogate.report = report
+        within_r2 = 1.0 - report["r2_vs_exact"] <= max_r2_loss
+        within_err = max_abs_error is None or report["max_error_vs_exact"] <= max_abs_error
+        report["within_budget"] = within_r2 and within_err
+        if report["within_budget"]:
+            break
+    return surrogate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a reduced-set surrogate of the diamond SVR.")
+    parser.add_argument("--model", default="diamond_model")
+    parser.add_argument("--eval-data", default="../30_testdatascaled.csv")
+    parser.add_argument("--output", default=None, help="defaults to <model>/approx.npz")
+    parser.add_argument("--max-r2-loss", type=float, default=0.005)
+    parser.add_argument("--max-abs-error", type=float, default=None)
+    parser.add_argument("--fit-size", type=int, default=8000)
+    args = parser.parse_args()
+
+    artifact = load_artifact(args.model)
+    X_eval = pd.read_csv(args.eval_data).to_numpy(dtype=np.float64)
+
+    surrogate = build_surrogate(artifact.model, X_eval, args.max_r2_loss, args.max_abs_error,
+                                args.fit_size)
+    if surrogate is None:
+        raise SystemExit(f"{len(artifact.model.support_vectors_)} support vectors: nothing to approximate")
+    print(json.dumps(surrogate.report, indent=2))
+    if not surrogate.within_budget:
+        raise SystemExit("no surrogate met the accuracy budget; not saving")
+    surrogate.report["artifact"] = artifact.checksum
+    surrogate.save(args.output or os.path.join(args.model, "approx.npz"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+def rbf_kernel(X, Y, gamma, Y_sq=None, chunk_size=128):
+    if Y_sq is None:
+        Y_sq = np.einsum("ij,ij->i", Y, Y)
+    out = np.empty((len(X), len(Y)), dtype=np.float64)
+    for start in range(0, len(X), chunk_size):
+        block = X[start:start + chunk_size]
+        dist = np.einsum("ij,ij->i", block, block)[:, None] + Y_sq[None, :] - 2.0 * block @ Y.T
+        np.maximum(dist, 0.0, out=dist)
+        np.multiply(dist, -gamma, out=dist)
+        out[start:start + chunk_size] = np.exp(dist, out=dist)
+    return out
+
+
+class KernelSVR:
+    """NumPy scorer for a fitted RBF SVR, built from its raw arrays."""
+
+    def __init__(self, support_vectors, dual_coef, intercept, gamma, C=None, epsilon=None):
+        self.support_vectors_ = support_vectors
+        self.dual_coef_ = np.asarray(dual_coef, dtype=np.float64).reshape(1, -1)
+        self.intercept_ = np.asarray(intercept, dtype=np.float64).reshape(1)
+        self.gamma = float(gamma)
+        self.C = C
+        self.epsilon = epsilon
+        self._sv_sq = np.einsum("ij,ij->i", support_vectors, support_vectors)
+
+    def predict(self, X, chunk_size=128):
+        X = np.asarray(X, dtype=np.float64)
+        coef = self.dual_coef_[0]
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            K = rbf_kernel(X[start:start + chunk_size], self.support_vectors_, self.gamma,
+                           Y_sq=self._sv_sq, chunk_size=chunk_size)
+            out[start:start + chunk_size] = K @ coef
+        return out + self.intercept_[0]
+
+
+class RandomFeatureRegressor:
+    """Linear model over random Fourier features that approximate an RBF kernel."""
+
+    def __init__(self, random_weights, random_offset, coef, intercept):
+        self.random_weights_ = random_weights
+        self.random_offset_ = random_offset
+        self.coef_ = np.asarray(coef, dtype=np.float64).ravel()
+        self.intercept_ = np.asarray(intercept, dtype=np.float64).reshape(1)
+        self._norm = np.sqrt(2.0 / len(self.coef_))
+
+    def predict(self, X, chunk_size=1024):
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            projection = X[start:start + chunk_size] @ self.random_weights_
+            projection += self.random_offset_
+            out[start:start + chunk_size] = np.cos(projection, out=projection) @ self.coef_
+        return out * self._norm + self.intercept_[0]
+
+
+def _model_entry(model):
+    if hasattr(model, "random_weights_"):
+        params = {
+            "type": "rff",
+            "n_components": len(model.coef_),
+            "intercept": float(np.ravel(model.intercept_)[0]),
+        }
+        arrays = {
+            "random_weights": np.ascontiguousarray(model.random_weights_, dtype=np.float64),
+            "random_offset": np.ascontiguousarray(model.random_offset_, dtype=np.float64),
+            "coef": np.ascontiguousarray(model.coef_, dtype=np.float64).ravel(),
+        }
+        return params, arrays
+
+    if getattr(model, "kernel", "rbf") != "rbf":
+        raise ArtifactError(f"Only RBF kernels are supported, got {model.kernel!r}")
+    params = {
+        "type": "svr",
+        "kernel": "rbf",
+        "gamma": float(getattr(model, "_gamma", model.gamma)),
+        "C": float(model.C),
+        "epsilon": float(model.epsilon),
+        "intercept": float(np.ravel(model.intercept_)[0]),
+    }
+    arrays = {
+        "support_vectors": np.ascontiguousarray(model.support_vectors_, dtype=np.float64),
+        "dual_coef": np.ascontiguousarray(model.dual_coef_, dtype=np.float64).ravel(),
+    }
+    return params, arrays
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _manifest_checksum(manifest):
+    body = {k: v for k, v in manifest.items() if k != "checksum"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+def write_artifact(path, model, encoders, scaler, metadata=None):
+    params, arrays = _model_entry(model)
+    arrays.update({
+        "scaler_mean": np.ascontiguousarray(scaler.mean_, dtype=np.float64),
+        "scaler_scale": np.ascontiguousarray(scaler.scale_, dtype=np.float64),
+    })
+    features = [str(name) for name in getattr(scaler, "feature_names_in_", [])]
+
+    parent, name = os.path.split(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    # A unique hidden name, so a directory left by a crashed write neither
+    # blocks the next one nor looks like a model version to the registry.
+    tmp_path = tempfile.mkdtemp(prefix=f".{name}.tmp-", dir=parent)
+    try:
+        os.chmod(tmp_path, 0o755)  # mkdtemp makes it owner-only
+        manifest = _write_files(tmp_path, params, arrays, features, encoders, metadata)
+        _swap(tmp_path, os.path.join(parent, name))
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _write_files(tmp_path, params, arrays, features, encoders, metadata):
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "model": params,
+        "features": features,
+        "encoders": {col: [str(c) for c in enc.classes_] for col, enc in encoders.items()},
+        "arrays": {},
+        "metadata": metadata or {},
+    }
+    for name, array in arrays.items():
+        filename = f"{name}.npy"
+        np.save(os.path.join(tmp_path, filename), array)
+        manifest["arrays"][name] = {
+            "file": filename,
+            "dtype": str(array.dtype),
+            "shape": list(array.shape),
+            "sha256": _sha256(os.path.join(tmp_path, filename)),
+        }
+    manifest["checksum"] = _manifest_checksum(manifest)
+    with open(os.path.join(tmp_path, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def _swap(tmp_path, path):
+    """Moves the finished directory to `path`. An existing one is renamed
+    aside first and deleted afterwards, so a reader never sees a
+    half-deleted artifact at `path`; at worst it is missing for an instant."""
+    if not os.path.exists(path):
+        os.replace(tmp_path, path)
+        return
+    old_path = f"{tmp_path}.old"
+    os.replace(path, old_path)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        os.replace(old_path, path)
+        raise
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+class ModelArtifact:
+    def __init__(self, path, manifest, model, encoders, scaler):
+        self.path = path
+        self.manifest = manifest
+        self.model = model
+        self.encoders = encoders
+        self.scaler = scaler
+
+    @property
+    def checksum(self):
+        return self.manifest["checksum"]
+
+
+def read_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError as exc:
+        raise ArtifactError(f"No {MANIFEST} in {path}") from exc
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format: {manifest.get('format_version')!r}")
+    if manifest.get("checksum") != _manifest_checksum(manifest):
+        raise ArtifactError(f"Manifest checksum mismatch in {path}")
+    return manifest
+
+
+def load_artifact(path, mmap=True, verify=True):
+    manifest = read_manifest(path)
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        array_path = os.path.join(path, spec["file"])
+        if verify and _sha256(array_path) != spec["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for {spec['file']} in {path}")
+        array = np.load(array_path, mmap_mode="r" if mmap else None, allow_pickle=False)
+        if str(array.dtype) != spec["dtype"] or list(array.shape) != spec["shape"]:
+            raise ArtifactError(f"{spec['file']} does not match its manifest entry")
+        arrays[name] = array
+
+    params = manifest["model"]
+    if params["type"] == "svr":
+        model = KernelSVR(arrays["support_vectors"], arrays["dual_coef"], params["intercept"],
+                          params["gamma"], C=params["C"], epsilon=params["epsilon"])
+    elif params["type"] == "rff":
+        model = RandomFeatureRegressor(arrays["random_weights"], arrays["random_offset"],
+                                       arrays["coef"], params["intercept"])
+    else:
+        raise ArtifactError(f"Unsupported model type: {params['type']!r}")
+    encoders = {
+        col: SimpleNamespace(classes_=np.array(classes, dtype=object))
+        for col, classes in manifest["encoders"].items()
+    }
+    scaler = SimpleNamespace(
+        mean_=np.asarray(arrays["scaler_mean"]),
+        scale_=np.asarray(arrays["scaler_scale"]),
+        feature_names_in_=np.array(manifest["features"], dtype=object),
+    )
+    return ModelArtifact(path, manifest, model, encoders, scaler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a pickled diamond model bundle into an artifact directory.")
+    parser.add_argument("source", nargs="?", default="diamond_model_complete.pkl")
+    parser.add_argument("target", nargs="?", default="diamond_model")
+    args = parser.parse_args()
+
+    import pickle
+
+    with open(args.source, "rb") as f:
+        saved_data = pickle.load(f)
+    manifest = write_artifact(args.target, saved_data["model"], saved_data["encoders"],
+                              saved_data["scaler"], metadata={"converted_from": args.source})
+    print(f"wrote {args.target} ({manifest['checksum'][:16]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+mimetypes.add_type("font/woff2", ".woff2")
+
+
+class Asset:
+    def __init__(self, path, body, mtime_ns):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/"):
+            self.content_type += "; charset=utf-8"
+        self.digest = hashlib.sha256(body).hexdigest()[:20]
+        self.bodies = {"identity": body}
+        if self.content_type.startswith(COMPRESSIBLE):
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=11)
+
+    def etag(self, encoding):
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+
+class AssetCache:
+    """Serves files from memory with precompressed variants and ETags.
+
+    Files are read once; ``watch`` files are re-read when their mtime changes,
+    checked at most every ``check_interval`` seconds.
+    """
+
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._assets = {}
+        self._watched = {}
+        self._lock = threading.Lock()
+
+    def add(self, url, path, cache_control=IMMUTABLE, watch=False):
+        self._assets[url] = (self._read(path), cache_control)
+        if watch:
+            self._watched[url] = [path, time.monotonic()]
+
+    def add_directory(self, prefix, directory, cache_control=IMMUTABLE):
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+                self.add(f"{prefix}/{relative}", path, cache_control)
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        return Asset(path, body, os.stat(path).st_mtime_ns)
+
+    def _refresh(self, url):
+        watched = self._watched.get(url)
+        if watched is None or time.monotonic() - watched[1] < self.check_interval:
+            return
+        with self._lock:
+            path, _ = watched
+            watched[1] = time.monotonic()
+            asset, cache_control = self._assets[url]
+            try:
+                if os.stat(path).st_mtime_ns != asset.mtime_ns:
+                    self._assets[url] = (self._read(path), cache_control)
+            except OSError:
+                pass
+
+    def __contains__(self, url):
+        return url in self._assets
+
+    def response(self, request, url):
+        self._refresh(url)
+        asset, cache_control = self._assets[url]
+        encoding = negotiate(request.headers.get("accept-encoding", ""), asset.bodies)
+        headers = {
+            "ETag": asset.etag(encoding),
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if etag_matches(request.headers.get("if-none-match"), asset.digest):
+            return Response(status_code=304, headers=headers)
+        return Response(asset.bodies[encoding], media_type=asset.content_type, headers=headers)
+
+
+def negotiate(accept_encoding, available):
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match, digest):
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"').split("-")[0] == digest:
+            return True
+    return False
@@ -0,0 +1,166 @@
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifact import load_artifact
+from fastencoding import FeatureEncoder
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet input is optional
+    pq = None
+
+_encoder = None
+_model = None
+
+
+def _init_worker(model_path):
+    global _encoder, _model
+    artifact = load_artifact(model_path, verify=False)
+    _encoder = FeatureEncoder(artifact.encoders, artifact.scaler, artifact.manifest["features"])
+    _model = artifact.model
+
+
+def score_chunk(start, frame):
+    columns = {}
+    errors = np.full(len(frame), "", dtype=object)
+    for col in _encoder.features:
+        if col not in frame:
+            raise ValueError(f"Input is missing column {col!r}")
+        values = frame[col]
+        if col in _encoder.lookup:
+            values = values.astype(str).to_numpy()
+        else:
+            values = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+        columns[col] = values
+
+    X = _encoder.transform_columns(columns)
+    bad = np.zeros(len(frame), dtype=bool)
+    for i, col, table in _encoder.columns:
+        invalid = np.isnan(X[:, i])
+        if invalid.any():
+            message = f"{col}: unseen label" if table is not None else f"{col}: not a number"
+            errors[invalid] = [f"{e}; {message}" if e else message for e in errors[invalid]]
+            bad |= invalid
+
+    predictions = np.full(len(frame), np.nan)
+    if (~bad).any():
+        predictions[~bad] = _model.predict(X[~bad])
+    return pd.DataFrame({
+        "row": np.arange(start, start + len(frame)),
+        "predicted_price": predictions,
+        "error": errors,
+    })
+
+
+def iter_chunks(path, chunk_size, skip_rows):
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise SystemExit("Reading Parquet requires pyarrow")
+        skipped = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            frame = batch.to_pandas()
+            if skipped + len(frame) <= skip_rows:
+                skipped += len(frame)
+                continue
+            yield frame.iloc[skip_rows - skipped:]
+            skipped = skip_rows
+        return
+    reader = pd.read_csv(
+        path,
+        chunksize=chunk_size,
+        skiprows=range(1, skip_rows + 1) if skip_rows else None,
+        dtype={"cut": str, "color": str, "clarity": str},
+    )
+    yield from reader
+
+
+def load_progress(progress_path):
+    try:
+        with open(progress_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_progress(progress_path, state):
+    tmp_path = f"{progress_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, progress_path)
+
+
+def run(args):
+    progress_path = f"{args.output}.progress"
+    state = load_progress(progress_path) if args.resume else None
+    if state is not None and state["input"] != os.path.abspath(args.input):
+        raise SystemExit(f"{progress_path} belongs to {state['input']}, not {args.input}")
+    if state is None:
+        state = {"input": os.path.abspath(args.input), "rows": 0, "bytes": 0, "done": False}
+    if state["done"]:
+        print(f"{args.output} is already complete ({state['rows']} rows)")
+        return
+
+    mode = "r+b" if state["bytes"] else "wb"
+    with open(args.output, mode) as out:
+        out.truncate(state["bytes"])
+        out.seek(state["bytes"])
+        if not state["bytes"]:
+            out.write(b"row,predicted_price,error\n")
+
+        started = time.perf_counter()
+        scored = 0
+        max_pending = args.workers * 2
+
+        def write(result):
+            nonlocal scored
+            result.to_csv(out, header=False, index=False, float_format="%.6f")
+            out.flush()
+            scored += len(result)
+            state["rows"] += len(result)
+            state["bytes"] = out.tell()
+            save_progress(progress_path, state)
+            elapsed = time.perf_counter() - started
+            print(f"\r{state['rows']} rows  {scored / elapsed:,.0f} rows/s",
+                  end="", file=sys.stderr, flush=True)
+
+        pending = deque()
+        next_row = state["rows"]
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(args.model,)) as pool:
+            for frame in iter_chunks(args.input, args.chunk_size, state["rows"]):
+                pending.append(pool.submit(score_chunk, next_row, frame))
+                next_row += len(frame)
+                while pending and (pending[0].done() or len(pending) >= max_pending):
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+        state["done"] = True
+        save_progress(progress_path, state)
+    elapsed = time.perf_counter() - started
+    print(f"\nscored {scored} rows in {elapsed:.1f}s ({scored / elapsed if elapsed else 0:,.0f} rows/s)"
+          f" -> {args.output}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a raw diamond CSV or Parquet file in parallel chunks.")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--model", default="diamond_model")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from <output>.progress after an interruption")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
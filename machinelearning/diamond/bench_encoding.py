@@ -0,0 +1,56 @@
+import argparse
+import pickle
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from fastencoding import FeatureEncoder
+
+FEATURES = ["carat", "cut", "color", "clarity", "depth", "table", "x", "y", "z"]
+
+
+def pandas_transform(rows, encoders, scaler):
+    input_data = pd.DataFrame(rows, columns=FEATURES)
+    for col in ["cut", "color", "clarity"]:
+        input_data[col] = encoders[col].transform(input_data[col])
+    return scaler.transform(input_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pandas and fused feature encoding.")
+    parser.add_argument("--model", default="diamond_model_complete.pkl")
+    parser.add_argument("--data", default="10-diamonds.csv")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.model, "rb") as f:
+        saved_data = pickle.load(f)
+    encoders, scaler = saved_data["encoders"], saved_data["scaler"]
+    fast = FeatureEncoder(encoders, scaler, FEATURES)
+
+    rows = pd.read_csv(args.data, nrows=args.rows)[FEATURES].to_dict("records")
+    expected = pandas_transform(rows, encoders, scaler)
+    actual = fast.transform(rows)
+    if not np.array_equal(expected, actual):
+        raise SystemExit(f"mismatch: max abs diff {np.abs(expected - actual).max()}")
+    print(f"outputs identical on {len(rows)} rows")
+
+    out = np.empty((1, len(FEATURES)), dtype=np.float64)
+    for batch in (1, 32, len(rows)):
+        sample = rows[:batch]
+        slow = min(timeit.repeat(lambda: pandas_transform(sample, encoders, scaler),
+                                 number=args.repeat, repeat=3)) / args.repeat
+        if batch == 1:
+            quick = min(timeit.repeat(lambda: fast.transform(sample, out=out),
+                                      number=args.repeat, repeat=3)) / args.repeat
+        else:
+            quick = min(timeit.repeat(lambda: fast.transform(sample),
+                                      number=args.repeat, repeat=3)) / args.repeat
+        print(f"batch={batch:>5}  pandas={slow * 1e6:10.1f} us  fused={quick * 1e6:10.1f} us"
+              f"  speedup={slow / quick:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
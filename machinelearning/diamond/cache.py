@@ -0,0 +1,86 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class PredictionCache:
+    """Bounded LRU cache of predictions with optional TTL and key rounding."""
+
+    def __init__(self, maxsize=10000, ttl=None, round_digits=None, version=None):
+        self.maxsize = int(maxsize)
+        self.ttl = ttl
+        self.round_digits = round_digits
+        self.version = version
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def key(self, row):
+        values = []
+        for name in sorted(row):
+            value = row[name]
+            if isinstance(value, float):
+                if self.round_digits is not None:
+                    value = round(value, self.round_digits)
+                value = value + 0.0  # -0.0 and 0.0 share a key
+            values.append((name, value))
+        return tuple(values)
+
+    def get(self, key):
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def set_version(self, version):
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._data.clear()
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "round_digits": self.round_digits,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,19 @@
+import os
+import pickle
+
+import pandas as pd
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FEATURES = ["carat", "cut", "color", "clarity", "depth", "table", "x", "y", "z"]
+
+
+@pytest.fixture(scope="session")
+def bundle():
+    with open(os.path.join(HERE, "diamond_model_complete.pkl"), "rb") as f:
+        return pickle.load(f)
+
+
+@pytest.fixture(scope="session")
+def rows():
+    return pd.read_csv(os.path.join(HERE, "10-diamonds.csv"), index_col=0).sample(200, random_state=0)[FEATURES]
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class FeatureEncoder:
+    """Label-encodes and standard-scales raw diamond rows without pandas.
+
+    Produces the same values as running each LabelEncoder over the
+    categorical columns of a DataFrame and then ``scaler.transform``.
+    """
+
+    def __init__(self, encoders, scaler, features):
+        self.features = list(features)
+        self.lookup = {
+            col: {label: float(code) for code, label in enumerate(enc.classes_)}
+            for col, enc in encoders.items()
+        }
+        self.columns = [(i, col, self.lookup.get(col)) for i, col in enumerate(self.features)]
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+    def check(self, row):
+        for col, table in self.lookup.items():
+            if row[col] not in table:
+                raise ValueError(f"{col} contains previously unseen label: {row[col]!r}")
+
+    def transform(self, rows, out=None):
+        if out is None:
+            out = np.empty((len(rows), len(self.features)), dtype=np.float64)
+        else:
+            out = out[:len(rows)]
+        for r, row in enumerate(rows):
+            values = out[r]
+            for i, col, table in self.columns:
+                values[i] = table[row[col]] if table is not None else row[col]
+        return self.scale_inplace(out)
+
+    def transform_columns(self, columns):
+        """Encode a mapping of column arrays; unknown categories become NaN."""
+        n = len(columns[self.features[0]])
+        out = np.empty((n, len(self.features)), dtype=np.float64)
+        for i, col, table in self.columns:
+            if table is None:
+                out[:, i] = np.asarray(columns[col], dtype=np.float64)
+            else:
+                out[:, i] = [table.get(value, np.nan) for value in columns[col]]
+        return self.scale_inplace(out)
+
+    def scale_inplace(self, out):
+        np.subtract(out, self.mean, out=out)
+        np.divide(out, self.scale, out=out)
+        return out
@@ -0,0 +1,228 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+FEATURES = ["carat", "cut", "color", "clarity", "depth", "table", "x", "y", "z"]
+NUMERIC = {"carat", "depth", "table", "x", "y", "z"}
+
+
+def load_payloads(path, sample_size, seed):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [
+            {name: float(row[name]) if name in NUMERIC else row[name] for name in FEATURES}
+            for row in csv.DictReader(f)
+        ]
+    rng = random.Random(seed)
+    return rng.sample(rows, min(sample_size, len(rows)))
+
+
+def rss_mb(pid=None):
+    if pid is None:
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage / 1024.0 if sys.platform != "darwin" else usage / (1024.0 * 1024.0)
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+    return None
+
+
+async def run_load(client, payloads, concurrency, duration, total_requests, endpoint):
+    latencies = []
+    statuses = {}
+    errors = 0
+    deadline = time.perf_counter() + duration if duration else None
+    issued = 0
+
+    async def worker(offset):
+        nonlocal errors, issued
+        i = offset
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if total_requests is not None:
+                if issued >= total_requests:
+                    return
+                issued += 1
+            payload = payloads[i % len(payloads)]
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=payload)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    lat = np.array(latencies) * 1000.0
+    return {
+        "requests": sum(statuses.values()) + errors,
+        "ok": len(latencies),
+        "status_counts": {str(k): v for k, v in sorted(statuses.items())},
+        "transport_errors": errors,
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": float(lat.mean()) if len(lat) else None,
+            "p50": float(np.percentile(lat, 50)) if len(lat) else None,
+            "p95": float(np.percentile(lat, 95)) if len(lat) else None,
+            "p99": float(np.percentile(lat, 99)) if len(lat) else None,
+            "max": float(lat.max()) if len(lat) else None,
+        },
+    }
+
+
+def free_port(port=0):
+    """Returns `port` (or an OS-chosen one for 0) after checking nothing listens on it."""
+    with socket.socket() as sock:
+        try:
+            sock.bind(("127.0.0.1", port))
+        except OSError as exc:
+            raise SystemExit(f"port {port} is already in use: {exc}") from exc
+        return sock.getsockname()[1]
+
+
+def start_server(port, env):
+    port = free_port(port)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env},
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited during startup (code {process.returncode})")
+        try:
+            response = httpx.get(f"{url}/model/info", timeout=1.0)
+        except httpx.HTTPError:
+            time.sleep(0.1)
+            continue
+        # Only count it ready if our process is still up and the answer is the diamond app.
+        if process.poll() is None and response.status_code == 200 and "live" in response.json():
+            return process, url
+        process.terminate()
+        raise SystemExit(f"{url}/model/info returned {response.status_code}, not the diamond app")
+    process.terminate()
+    raise SystemExit("uvicorn did not become ready")
+
+
+async def benchmark(args):
+    payloads = load_payloads(args.data, args.sample_size, args.seed)
+    server = None
+    server_pid = None
+    memory = None
+    env = dict(kv.split("=", 1) for kv in args.env)
+
+    if args.mode == "inprocess":
+        os.environ.update(env)
+        import app
+
+        transport = httpx.ASGITransport(app=app.app)
+        base_url = "http://inprocess"
+    else:
+        if args.url:
+            base_url = args.url
+        else:
+            server, base_url = start_server(args.port, env)
+            server_pid = server.pid
+        transport = None
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url,
+                                     limits=limits, timeout=args.timeout) as client:
+            if args.warmup:
+                await run_load(client, payloads, args.concurrency, None, args.warmup, args.endpoint)
+            result = await run_load(client, payloads, args.concurrency, args.duration,
+                                    args.requests, args.endpoint)
+            info = (await client.get("/model/info")).json()
+    finally:
+        if server is not None:
+            memory = rss_mb(server_pid)
+            server.terminate()
+            server.wait()
+    if args.mode == "inprocess":
+        memory = rss_mb()
+
+    result.update({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "mode": args.mode if not args.url else "remote",
+        "endpoint": args.endpoint,
+        "concurrency": args.concurrency,
+        "payload_sample_size": len(payloads),
+        "server_rss_mb" if server_pid else "process_max_rss_mb": memory,
+        "env": env,
+        "model": {
+            "scoring_mode": info.get("scoring_mode"),
+            "live": (info.get("live") or {}).get("id"),
+        },
+    })
+    return result
+
+
+def compare(current, baseline):
+    rows = []
+    for key in ("p50", "p95", "p99"):
+        old, new = baseline["latency_ms"].get(key), current["latency_ms"].get(key)
+        if old and new:
+            rows.append(f"latency {key}: {old:.2f} -> {new:.2f} ms ({(new - old) / old * 100:+.1f}%)")
+    old, new = baseline["requests_per_second"], current["requests_per_second"]
+    if old:
+        rows.append(f"throughput: {old:.1f} -> {new:.1f} req/s ({(new - old) / old * 100:+.1f}%)")
+    return "\n".join(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the diamond prediction API.")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--url", help="benchmark an already running server instead")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--endpoint", default="/predict")
+    parser.add_argument("--data", default="10-diamonds.csv")
+    parser.add_argument("--sample-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--requests", type=int, default=None, help="stop after N requests instead")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="DIAMOND_* settings for the app under test")
+    parser.add_argument("--output", help="write the JSON result here")
+    parser.add_argument("--compare", help="baseline JSON result to compare against")
+    args = parser.parse_args()
+    if args.requests is not None:
+        args.duration = None
+
+    result = asyncio.run(benchmark(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare(result, json.load(f)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+from bisect import bisect_left
+from collections import Counter as _Tally
+from contextlib import contextmanager
+import sys
+import threading
+import time
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(labels, (None, 0.0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._values[labels] = (counts, total + value)
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}")
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_text} {total}")
+                lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REQUESTS = REGISTRY.register(Counter(
+    "diamond_requests_total", "HTTP requests handled.", ("method", "route", "status")))
+ERRORS = REGISTRY.register(Counter(
+    "diamond_errors_total", "Requests that failed, by reason.", ("route", "reason")))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "diamond_request_duration_seconds", "End-to-end request latency.", ("route",)))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "diamond_stage_duration_seconds", "Time spent in each stage of the predict path.", ("stage",)))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware counting requests and timing them.
+
+    The duration is recorded when the last body message has been sent, so
+    a streamed response is timed to completion, not to its first byte.
+    ``scope["state"]["started"]`` carries the start time to the handlers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        scope.setdefault("state", {})["started"] = started
+        status = None
+        finished = False
+
+        def route():
+            route = scope.get("route")
+            return route.path if route else "unmatched"
+
+        async def send_and_record(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = True
+                REQUESTS.inc(scope["method"], route(), status)
+                REQUEST_SECONDS.observe(time.perf_counter() - started, route())
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        except Exception:
+            if not finished:
+                ERRORS.inc(route(), "exception")
+                REQUESTS.inc(scope["method"], route(), 500)
+            raise
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads at a fixed interval into collapsed-stack counts.
+
+    Only threads of this process are sampled; scoring done in WorkerPool
+    processes shows up as the main process waiting on the executor.
+    """
+
+    def __init__(self):
+        self.samples = _Tally()
+        self.interval = 0.005
+        self.started_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval=0.005):
+        if self.running:
+            return
+        self.samples.clear()
+        self.interval = interval
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.collapsed()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self, limit=None):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common(limit))
+
+
+PROFILER = SamplingProfiler()
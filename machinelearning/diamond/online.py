@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.kernel_approximation import RBFSampler
+from sklearn.linear_model import SGDRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.preprocessing import StandardScaler
+
+from artifact import RandomFeatureRegressor, load_artifact, write_artifact
+from fastencoding import FeatureEncoder
+from pipeline import CATEGORICAL, filter_outliers
+
+FEATURES = ["carat", "cut", "color", "clarity", "depth", "table", "x", "y", "z"]
+
+
+class OnlineModel:
+    """RBF-kernel price model that is updated one batch at a time.
+
+    Random Fourier features stand in for the SVR kernel and an SGD regressor
+    learns the weights, so a new batch costs the same however much history
+    has been seen. Scaler statistics and encoder categories are updated from
+    each batch; new labels are appended so existing codes never change.
+    """
+
+    def __init__(self, gamma=0.1, n_components=2000, alpha=1e-6, eta0=0.1, random_state=0):
+        self.categories = {col: [] for col in CATEGORICAL}
+        self.scaler = StandardScaler()
+        self.target = StandardScaler()
+        self.sampler = RBFSampler(gamma=gamma, n_components=n_components, random_state=random_state)
+        self.sampler.fit(np.zeros((1, len(FEATURES))))
+        self.sgd = SGDRegressor(alpha=alpha, learning_rate="invscaling", eta0=eta0,
+                                random_state=random_state)
+        self.rows_seen = 0
+        self.batches = 0
+
+    def encode(self, frame):
+        X = frame[FEATURES].copy()
+        for col in CATEGORICAL:
+            codes = {label: float(i) for i, label in enumerate(self.categories[col])}
+            X[col] = X[col].astype(str).map(codes)
+        return X.to_numpy(dtype=np.float64)
+
+    def predict(self, frame):
+        """Predicts prices; rows with labels the model has not seen yet are NaN."""
+        X = self.encode(frame)
+        out = np.full(len(X), np.nan)
+        known = ~np.isnan(X).any(axis=1)
+        if self.batches and known.any():
+            out[known] = self.regressor().predict(self.scaler.transform(X[known]))
+        return out
+
+    def partial_fit(self, frame, epochs=1):
+        added = {}
+        for col in CATEGORICAL:
+            new = sorted(set(frame[col].astype(str)) - set(self.categories[col]))
+            if new:
+                self.categories[col].extend(new)
+                added[col] = new
+
+        X = self.encode(frame)
+        y = frame["price"].to_numpy(dtype=np.float64).reshape(-1, 1)
+        self.scaler.partial_fit(X)
+        self.target.partial_fit(y)
+        Z = self.sampler.transform(self.scaler.transform(X))
+        y_scaled = self.target.transform(y).ravel()
+        rng = np.random.default_rng(self.batches)
+        for _ in range(epochs):
+            order = rng.permutation(len(Z))
+            self.sgd.partial_fit(Z[order], y_scaled[order])
+        self.rows_seen += len(frame)
+        self.batches += 1
+        return added
+
+    def save(self, path):
+        # Only plain attributes are stored so the state loads no matter how this module was run.
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(vars(self), tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        model = cls.__new__(cls)
+        model.__dict__.update(joblib.load(path))
+        return model
+
+    def regressor(self):
+        mean, scale = self.target.mean_[0], self.target.scale_[0]
+        return RandomFeatureRegressor(
+            self.sampler.random_weights_,
+            self.sampler.random_offset_,
+            self.sgd.coef_ * scale,
+            self.sgd.intercept_[0] * scale + mean,
+        )
+
+    def export(self, path, metadata=None):
+        encoders = {col: SimpleNamespace(classes_=labels) for col, labels in self.categories.items()}
+        scaler = SimpleNamespace(mean_=self.scaler.mean_, scale_=self.scaler.scale_,
+                                 feature_names_in_=FEATURES)
+        return write_artifact(path, self.regressor(), encoders, scaler, metadata={
+            "online": {"rows_seen": self.rows_seen, "batches": self.batches},
+            **(metadata or {}),
+        })
+
+
+class DriftReport:
+    """Compares incoming batches with the deployed artifact and its predictions."""
+
+    def __init__(self, baseline):
+        self.baseline = baseline
+        self.encoder = FeatureEncoder(baseline.encoders, baseline.scaler, baseline.manifest["features"])
+        self.numeric = [(i, col) for i, col in enumerate(self.encoder.features)
+                        if col not in self.encoder.lookup]
+        self.sums = np.zeros(len(self.numeric))
+        self.rows = 0
+        self.unseen = {}
+        self.prices = []
+        self.baseline_predictions = []
+        self.online_predictions = []
+
+    def add(self, frame, online_predictions):
+        self.rows += len(frame)
+        for n, (_, col) in enumerate(self.numeric):
+            self.sums[n] += frame[col].sum()
+        columns = {col: frame[col].astype(str).to_numpy() if col in self.encoder.lookup
+                   else frame[col].to_numpy(dtype=np.float64) for col in self.encoder.features}
+        for col, table in self.encoder.lookup.items():
+            for label in columns[col]:
+                if label not in table:
+                    counts = self.unseen.setdefault(col, {})
+                    counts[label] = counts.get(label, 0) + 1
+
+        X = self.encoder.transform_columns(columns)
+        known = ~np.isnan(X).any(axis=1)
+        baseline = np.full(len(frame), np.nan)
+        if known.any():
+            baseline[known] = self.baseline.model.predict(X[known])
+        self.prices.append(frame["price"].to_numpy(dtype=np.float64))
+        self.baseline_predictions.append(baseline)
+        self.online_predictions.append(online_predictions)
+
+    def summary(self):
+        prices = np.concatenate(self.prices) if self.prices else np.empty(0)
+        baseline = np.concatenate(self.baseline_predictions) if self.prices else np.empty(0)
+        online = np.concatenate(self.online_predictions) if self.prices else np.empty(0)
+        features = {}
+        for n, (i, col) in enumerate(self.numeric):
+            mean = self.sums[n] / self.rows if self.rows else float("nan")
+            reference = float(self.baseline.scaler.mean_[i])
+            features[col] = {
+                "baseline_mean": reference,
+                "batch_mean": float(mean),
+                "shift_in_std": float((mean - reference) / self.baseline.scaler.scale_[i]),
+            }
+        return {
+            "baseline": self.baseline.manifest["checksum"][:12],
+            "rows": self.rows,
+            "features": features,
+            "unseen_labels": self.unseen,
+            "baseline_model": _score(prices, baseline),
+            "online_model_before_update": _score(prices, online),
+            "mean_prediction_shift": _mean_shift(baseline, online),
+        }
+
+
+def _score(y, predictions):
+    known = ~np.isnan(predictions)
+    if known.sum() < 2:
+        return {"rows": int(known.sum())}
+    return {
+        "rows": int(known.sum()),
+        "r2": float(r2_score(y[known], predictions[known])),
+        "mae": float(mean_absolute_error(y[known], predictions[known])),
+    }
+
+
+def _mean_shift(baseline, online):
+    both = ~np.isnan(baseline) & ~np.isnan(online)
+    return float(online[both].mean() - baseline[both].mean()) if both.any() else None
+
+
+def iter_batches(paths, chunk_size):
+    for path in paths:
+        for frame in pd.read_csv(path, chunksize=chunk_size,
+                                 dtype={"cut": str, "color": str, "clarity": str}):
+            yield path, filter_outliers(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the online diamond price model with new priced batches.")
+    parser.add_argument("batches", nargs="+", help="CSV files of priced diamonds, oldest first")
+    parser.add_argument("--state", default=".online_state/model.joblib")
+    parser.add_argument("--output", default="diamond_model_online", help="artifact directory to write")
+    parser.add_argument("--baseline", default="diamond_model", help="deployed artifact to report drift against")
+    parser.add_argument("--report", help="write the drift report JSON here")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--epochs", type=int, default=5, help="SGD passes over each chunk")
+    parser.add_argument("--gamma", type=float, default=0.1, help="kernel width for a new state")
+    parser.add_argument("--components", type=int, default=2000, help="random features for a new state")
+    args = parser.parse_args()
+
+    if os.path.exists(args.state):
+        model = OnlineModel.load(args.state)
+    else:
+        model = OnlineModel(gamma=args.gamma, n_components=args.components)
+    report = DriftReport(load_artifact(args.baseline)) if args.baseline else None
+
+    started = time.perf_counter()
+    rows = 0
+    added = {}
+    for path, frame in iter_batches(args.batches, args.chunk_size):
+        if report is not None:
+            report.add(frame, model.predict(frame))
+        for col, labels in model.partial_fit(frame, epochs=args.epochs).items():
+            added.setdefault(col, []).extend(labels)
+        rows += len(frame)
+        print(f"\r{path}: {rows} rows  {rows / (time.perf_counter() - started):,.0f} rows/s",
+              end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+
+    model.save(args.state)
+
+    summary = report.summary() if report is not None else {}
+    summary["new_labels"] = added
+    manifest = model.export(args.output, metadata={"drift": summary})
+    print(json.dumps(summary, indent=2))
+    print(f"wrote {args.output} ({manifest['checksum'][:16]}) after {model.rows_seen} rows"
+          f" in {model.batches} batches", file=sys.stderr)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import pandas as pd
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.svm import SVR
+
+from artifact import write_artifact
+from registry import new_version_path
+
+CATEGORICAL = ["cut", "color", "clarity"]
+
+DEFAULTS = {
+    "data": "10-diamonds.csv",
+    "depth_range": [45, 75],
+    "table_range": [40, 80],
+    "y_max": 30,
+    "z_range": [2, 30],
+    "test_size": 0.25,
+    "random_state": 15,
+    "C": 1000.0,
+    "gamma": 0.1,
+    "epsilon": 0.1,
+}
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def filter_outliers(df, config=DEFAULTS):
+    df = df[(df["x"] != 0) & (df["y"] != 0) & (df["z"] != 0)]
+    df = df[(df["depth"] < config["depth_range"][1]) & (df["depth"] > config["depth_range"][0])]
+    df = df[(df["table"] < config["table_range"][1]) & (df["table"] > config["table_range"][0])]
+    df = df[df["y"] < config["y_max"]]
+    return df[(df["z"] < config["z_range"][1]) & (df["z"] > config["z_range"][0])]
+
+
+class Pipeline:
+    """Runs the SavingModels.ipynb training steps with on-disk caching per stage.
+
+    Each stage is keyed by its own parameters plus the keys of the stages it
+    consumes, so changing the SVR hyperparameters reuses the cleaned, encoded
+    and scaled data.
+    """
+
+    def __init__(self, config=None, cache_dir=".pipeline_cache"):
+        self.config = {**DEFAULTS, **(config or {})}
+        self.cache_dir = cache_dir
+        self.timings = []
+        self.output = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def stage(self, name, params, inputs, fn):
+        key = hashlib.sha256(json.dumps(
+            {"stage": name, "params": params, "inputs": [key for key, _ in inputs]},
+            sort_keys=True,
+        ).encode()).hexdigest()[:24]
+        path = os.path.join(self.cache_dir, f"{name}-{key}.joblib")
+        start = time.perf_counter()
+        if os.path.exists(path):
+            value = joblib.load(path)
+            cached = True
+        else:
+            value = fn(*[value for _, value in inputs])
+            tmp_path = f"{path}.tmp"
+            joblib.dump(value, tmp_path)
+            os.replace(tmp_path, path)
+            cached = False
+        self.timings.append({
+            "stage": name,
+            "key": key,
+            "cached": cached,
+            "seconds": time.perf_counter() - start,
+        })
+        return key, value
+
+    def load(self):
+        path = self.config["data"]
+        return self.stage("load", {"sha256": file_digest(path)}, [],
+                          lambda: pd.read_csv(path).drop(["Unnamed: 0"], axis=1, errors="ignore"))
+
+    def clean(self, raw):
+        params = {k: self.config[k] for k in ("depth_range", "table_range", "y_max", "z_range")}
+        return self.stage("clean", params, [raw], lambda df: filter_outliers(df, params))
+
+    def split(self, cleaned):
+        params = {k: self.config[k] for k in ("test_size", "random_state")}
+
+        def run(df):
+            X = df.drop(["price"], axis=1)
+            y = df["price"]
+            return train_test_split(X, y, test_size=params["test_size"],
+                                    random_state=params["random_state"])
+
+        return self.stage("split", params, [cleaned], run)
+
+    def encode(self, split):
+        def run(parts):
+            X_train, X_test, y_train, y_test = (p.copy() for p in parts)
+            encoders = {}
+            for col in CATEGORICAL:
+                encoders[col] = LabelEncoder()
+                X_train[col] = encoders[col].fit_transform(X_train[col])
+                X_test[col] = encoders[col].transform(X_test[col])
+            return encoders, X_train, X_test, y_train, y_test
+
+        return self.stage("encode", {"columns": CATEGORICAL}, [split], run)
+
+    def scale(self, encoded):
+        def run(parts):
+            encoders, X_train, X_test, y_train, y_test = parts
+            scaler = StandardScaler()
+            X_train_scaled = scaler.fit_transform(X_train)
+            X_test_scaled = scaler.transform(X_test)
+            return scaler, X_train_scaled, X_test_scaled
+
+        return self.stage("scale", {}, [encoded], run)
+
+    def fit(self, encoded, scaled):
+        params = {k: self.config[k] for k in ("C", "gamma", "epsilon")}
+
+        def run(encoded_parts, scaled_parts):
+            y_train = encoded_parts[3]
+            _, X_train_scaled, _ = scaled_parts
+            svr = SVR(kernel="rbf", **params)
+            svr.fit(X_train_scaled, y_train)
+            return svr
+
+        return self.stage("fit", params, [encoded, scaled], run)
+
+    def evaluate(self, encoded, scaled, model):
+        def run(encoded_parts, scaled_parts, svr):
+            y_test = encoded_parts[4]
+            _, _, X_test_scaled = scaled_parts
+            return {"r2": float(r2_score(y_test, svr.predict(X_test_scaled)))}
+
+        return self.stage("evaluate", {}, [encoded, scaled, model], run)
+
+    def run(self, output=None, test_output=None, root="models"):
+        """Trains and writes the artifact to `output`, by default a new
+        unpublished version under the registry `root`."""
+        raw = self.load()
+        cleaned = self.clean(raw)
+        split = self.split(cleaned)
+        encoded = self.encode(split)
+        scaled = self.scale(encoded)
+        model = self.fit(encoded, scaled)
+        scores = self.evaluate(encoded, scaled, model)
+
+        start = time.perf_counter()
+        encoders = encoded[1][0]
+        scaler, _, X_test_scaled = scaled[1]
+        self.output = output or new_version_path(root)
+        manifest = write_artifact(self.output, model[1], encoders, scaler, metadata={
+            "pipeline": {"config": self.config, "stages": self.timings, **scores[1]},
+        })
+        if test_output:
+            pd.DataFrame(X_test_scaled).to_csv(test_output, index=False)
+        self.timings.append({"stage": "export", "key": manifest["checksum"][:24], "cached": False,
+                             "seconds": time.perf_counter() - start})
+        return manifest, scores[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the diamond SVR and write a deployable artifact.")
+    parser.add_argument("--data", default=DEFAULTS["data"])
+    parser.add_argument("--root", default=os.environ.get("DIAMOND_MODEL_PATH", "models"),
+                        help="registry directory the new version is written under")
+    parser.add_argument("--output", help="write the artifact here instead of a new version under --root")
+    parser.add_argument("--test-output", help="also write the scaled test split as CSV")
+    parser.add_argument("--cache-dir", default=".pipeline_cache")
+    parser.add_argument("--C", type=float, default=DEFAULTS["C"])
+    parser.add_argument("--gamma", type=float, default=DEFAULTS["gamma"])
+    parser.add_argument("--epsilon", type=float, default=DEFAULTS["epsilon"])
+    parser.add_argument("--test-size", type=float, default=DEFAULTS["test_size"])
+    parser.add_argument("--random-state", type=int, default=DEFAULTS["random_state"])
+    args = parser.parse_args()
+
+    pipeline = Pipeline({
+        "data": args.data,
+        "C": args.C,
+        "gamma": args.gamma,
+        "epsilon": args.epsilon,
+        "test_size": args.test_size,
+        "random_state": args.random_state,
+    }, cache_dir=args.cache_dir)
+    manifest, scores = pipeline.run(args.output, args.test_output, root=args.root)
+    for timing in pipeline.timings:
+        status = "cached" if timing["cached"] else "ran"
+        print(f"{timing['stage']:<9} {status:<7} {timing['seconds']:8.2f}s  {timing['key']}")
+    print(f"r2: {scores['r2']:.4f}  artifact: {pipeline.output} ({manifest['checksum'][:16]})")
+    if not args.output:
+        print(f"publish with: python registry.py {args.root} {os.path.basename(pipeline.output)} [--candidate]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+from collections import deque
+import logging
+import os
+import random
+import time
+
+import numpy as np
+
+from artifact import MANIFEST, ArtifactError
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger("diamond.registry")
+
+LIVE_FILE = "LIVE"
+CANDIDATE_FILE = "CANDIDATE"
+
+
+class VersionStats:
+    def __init__(self, window=4096):
+        self.latencies = deque(maxlen=window)
+        self.predictions = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def record(self, latency, prediction):
+        self.requests += 1
+        self.latencies.append(latency)
+        self.predictions.append(prediction)
+        delta = prediction - self.mean
+        self.mean += delta / self.requests
+        self._m2 += delta * (prediction - self.mean)
+
+    def record_error(self):
+        self.errors += 1
+
+    def summary(self):
+        summary = {"requests": self.requests, "errors": self.errors}
+        if self.latencies:
+            p50, p95, p99 = np.percentile(np.fromiter(self.latencies, float), [50, 95, 99])
+            summary["latency_ms"] = {"p50": p50 * 1e3, "p95": p95 * 1e3, "p99": p99 * 1e3}
+        if self.predictions:
+            q = np.percentile(np.fromiter(self.predictions, float), [5, 25, 50, 75, 95])
+            summary["prediction"] = {
+                "mean": self.mean,
+                "std": (self._m2 / self.requests) ** 0.5,
+                "quantiles": dict(zip(["p5", "p25", "p50", "p75", "p95"], q.tolist())),
+            }
+        return summary
+
+
+class ModelVersion:
+    def __init__(self, name, path, artifact, encoder, scorer, fingerprint):
+        self.name = name
+        self.path = path
+        self.artifact = artifact
+        self.encoder = encoder
+        self.scorer = scorer
+        self.fingerprint = fingerprint
+        self.id = f"{name}@{artifact.checksum[:12]}"
+        self.spec = (path, artifact.checksum, getattr(scorer, "path", None))
+        self.loaded_at = time.time()
+        self.stats = VersionStats()
+
+    def check(self, row):
+        self.encoder.check(row)
+
+    def predict(self, rows):
+        with STAGE_SECONDS.time("encode"):
+            X = self.encoder.transform(rows)
+        with STAGE_SECONDS.time("model_predict"):
+            predictions = self.scorer.predict(X)
+        return [float(p) for p in predictions]
+
+    def info(self):
+        return {
+            "id": self.id,
+            "path": self.path,
+            "created": self.artifact.manifest["created"],
+            "loaded_at": self.loaded_at,
+            "stats": self.stats.summary(),
+        }
+
+
+def manifest_fingerprint(path):
+    try:
+        st = os.stat(os.path.join(path, MANIFEST))
+    except FileNotFoundError:
+        return None
+    return (os.path.realpath(path), st.st_mtime_ns, st.st_size)
+
+
+def write_pointer(root, filename, name):
+    tmp_path = os.path.join(root, f".{filename}.tmp-{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"{name}\n")
+    os.replace(tmp_path, os.path.join(root, filename))
+
+
+def new_version_path(root):
+    """Returns a fresh, unpublished version directory under ``root``.
+
+    Without a ``LIVE`` file the newest version is served, so the version
+    currently served is pinned first; the new one only goes live once a
+    pointer file names it.
+    """
+    os.makedirs(root, exist_ok=True)
+    if os.path.exists(os.path.join(root, MANIFEST)):
+        raise ArtifactError(f"{root} is a single artifact, not a directory of versions")
+    if not os.path.exists(os.path.join(root, LIVE_FILE)):
+        live, _ = ModelRegistry(root, None).discover()
+        if live is not None:
+            write_pointer(root, LIVE_FILE, os.path.basename(live))
+    base = path = os.path.join(root, time.strftime("v%Y%m%d-%H%M%S"))
+    suffix = 1
+    while os.path.exists(path):
+        path = f"{base}-{suffix}"
+        suffix += 1
+    return path
+
+
+class ModelRegistry:
+    """Tracks the live and candidate model versions under an artifact directory.
+
+    ``root`` is either a single artifact directory or a directory of versioned
+    artifact directories. In the latter case ``LIVE`` and ``CANDIDATE`` files
+    name the versions to serve; without ``LIVE`` the newest version is served.
+    """
+
+    def __init__(self, root, load_version, poll_interval=5.0,
+                 candidate_percent=0.0, candidate_mode="canary"):
+        if candidate_mode not in ("canary", "shadow"):
+            raise ValueError(f"Unknown candidate mode: {candidate_mode!r}")
+        self.root = root
+        self.load_version = load_version
+        self.poll_interval = poll_interval
+        self.candidate_percent = candidate_percent
+        self.candidate_mode = candidate_mode
+        self.live = None
+        self.candidate = None
+        self.swaps = 0
+        self.load_errors = 0
+        self.listeners = []
+        self._lock = asyncio.Lock()
+        self._watcher = None
+
+    def _read_pointer(self, filename):
+        try:
+            with open(os.path.join(self.root, filename), "r", encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name or None
+
+    def discover(self):
+        if os.path.exists(os.path.join(self.root, MANIFEST)):
+            return self.root, None
+        versions = sorted(
+            entry.name for entry in os.scandir(self.root)
+            if entry.is_dir() and not entry.name.startswith(".")
+            and os.path.exists(os.path.join(entry.path, MANIFEST))
+        )
+        live = self._read_pointer(LIVE_FILE) or (versions[-1] if versions else None)
+        candidate = self._read_pointer(CANDIDATE_FILE)
+        if candidate == live:
+            candidate = None
+        return (
+            os.path.join(self.root, live) if live else None,
+            os.path.join(self.root, candidate) if candidate else None,
+        )
+
+    def _load(self, path):
+        name = os.path.basename(os.path.normpath(path))
+        return self.load_version(name, path, manifest_fingerprint(path))
+
+    def _needs_load(self, current, path):
+        if path is None:
+            return False
+        fingerprint = manifest_fingerprint(path)
+        return fingerprint is not None and (current is None or current.fingerprint != fingerprint)
+
+    def load_initial(self):
+        live_path, candidate_path = self.discover()
+        if live_path is None:
+            raise ArtifactError(f"No model artifact found under {self.root}")
+        self._swap_live(self._load(live_path))
+        if candidate_path is not None:
+            self.candidate = self._load(candidate_path)
+
+    async def refresh(self):
+        async with self._lock:
+            changed = False
+            try:
+                live_path, candidate_path = self.discover()
+                if self._needs_load(self.live, live_path):
+                    self._swap_live(await asyncio.to_thread(self._load, live_path))
+                    changed = True
+                if candidate_path is None:
+                    changed = changed or self.candidate is not None
+                    self.candidate = None
+                elif self._needs_load(self.candidate, candidate_path):
+                    self.candidate = await asyncio.to_thread(self._load, candidate_path)
+                    changed = True
+            except (ArtifactError, OSError, ValueError) as exc:
+                self.load_errors += 1
+                logger.warning("Keeping current model, failed to load new version: %s", exc)
+            return changed
+
+    def _swap_live(self, version):
+        previous, self.live = self.live, version
+        self.swaps += 1
+        logger.info("Serving model %s", version.id)
+        for listener in self.listeners:
+            listener(version, previous)
+
+    async def start(self):
+        if self._watcher is None and self.poll_interval > 0:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                # One bad poll (say a listener raising) must not end the watcher.
+                logger.exception("Model refresh failed")
+
+    def route(self):
+        """Return ``(serving_version, shadow_version_or_None)`` for one request."""
+        live, candidate = self.live, self.candidate
+        if candidate is None or random.random() * 100.0 >= self.candidate_percent:
+            return live, None
+        if self.candidate_mode == "shadow":
+            return live, candidate
+        return candidate, None
+
+    def info(self):
+        return {
+            "root": self.root,
+            "candidate_mode": self.candidate_mode,
+            "candidate_percent": self.candidate_percent,
+            "swaps": self.swaps,
+            "load_errors": self.load_errors,
+            "live": self.live.info() if self.live else None,
+            "candidate": self.candidate.info() if self.candidate else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish a model version by pointing LIVE or CANDIDATE at it.")
+    parser.add_argument("root", help="directory of versioned artifacts")
+    parser.add_argument("version", help="version directory name, or '-' to clear the candidate")
+    parser.add_argument("--candidate", action="store_true", help="set CANDIDATE instead of LIVE")
+    args = parser.parse_args()
+
+    filename = CANDIDATE_FILE if args.candidate else LIVE_FILE
+    if args.version == "-" and args.candidate:
+        if os.path.exists(os.path.join(args.root, filename)):
+            os.remove(os.path.join(args.root, filename))
+        print(f"cleared {filename}")
+        return
+    if not os.path.exists(os.path.join(args.root, args.version, MANIFEST)):
+        parser.error(f"no artifact at {os.path.join(args.root, args.version)}")
+    write_pointer(args.root, filename, args.version)
+    print(f"{filename} -> {args.version}")
+
+
+if __name__ == "__main__":
+    main()
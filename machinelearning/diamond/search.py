@@ -0,0 +1,211 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.svm import SVR
+
+from artifact import KernelSVR, rbf_kernel
+from pipeline import DEFAULTS, Pipeline
+
+_data = {}
+
+
+def _init_worker(data_dir):
+    for name in ("X", "y", "X_val", "y_val"):
+        _data[name] = np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode="r")
+
+
+def fit_config(config, rows, kernel_path=None):
+    X = _data["X"][:rows]
+    y = np.asarray(_data["y"][:rows])
+    start = time.perf_counter()
+    if kernel_path is not None:
+        model = SVR(kernel="precomputed", C=config["C"], epsilon=config["epsilon"])
+        model.fit(np.load(kernel_path, mmap_mode="r"), y)
+        support_vectors = np.ascontiguousarray(X[model.support_])
+    else:
+        model = SVR(kernel="rbf", **config)
+        model.fit(X, y)
+        support_vectors = model.support_vectors_
+    fit_seconds = time.perf_counter() - start
+
+    # Score with the same NumPy kernel the API serves with, so predict time
+    # reflects production latency rather than libsvm's.
+    scorer = KernelSVR(support_vectors, model.dual_coef_, model.intercept_, config["gamma"])
+    X_val = np.asarray(_data["X_val"])
+    start = time.perf_counter()
+    predictions = scorer.predict(X_val)
+    predict_seconds = time.perf_counter() - start
+    return {
+        **config,
+        "rows": rows,
+        "r2": float(r2_score(_data["y_val"], predictions)),
+        "fit_seconds": fit_seconds,
+        "predict_us_per_row": predict_seconds * 1e6 / len(X_val),
+        "support_vectors": len(support_vectors),
+    }
+
+
+def prepare_data(pipeline, data_dir, validation_size, seed):
+    """Fixes the validation split and subsample order once so every rung reuses them."""
+    encoded = pipeline.encode(pipeline.split(pipeline.clean(pipeline.load())))
+    scaled = pipeline.scale(encoded)
+    key = hashlib.sha256(f"{scaled[0]}-{validation_size}-{seed}".encode()).hexdigest()[:24]
+    path = os.path.join(data_dir, f"search-{key}")
+    if not os.path.exists(path):
+        _, X_train, _ = scaled[1]
+        y_train = encoded[1][3].to_numpy(dtype=np.float64)
+        order = np.random.default_rng(seed).permutation(len(X_train))
+        n_val = int(len(order) * validation_size)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path)
+        for name, array in (
+            ("X", X_train[order[n_val:]]),
+            ("y", y_train[order[n_val:]]),
+            ("X_val", X_train[order[:n_val]]),
+            ("y_val", y_train[order[:n_val]]),
+        ):
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+    return path
+
+
+def kernel_matrix(data_dir, gamma, rows, chunk_size=1024):
+    """Writes the rows x rows RBF kernel to a .npy file the workers memory-map.
+
+    At 6000 rows that is 288 MB, so the caller deletes it once the rung is done.
+    """
+    path = os.path.join(data_dir, f"kernel-{gamma!r}-{rows}.npy")
+    X = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")[:rows]
+    X = np.asarray(X)
+    X_sq = np.einsum("ij,ij->i", X, X)
+    tmp_path = f"{path}.tmp-{os.getpid()}.npy"
+    K = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=(rows, rows))
+    for start in range(0, rows, chunk_size):
+        K[start:start + chunk_size] = rbf_kernel(X[start:start + chunk_size], X, gamma, Y_sq=X_sq)
+    K.flush()
+    del K
+    os.replace(tmp_path, path)
+    return path
+
+
+def rung_sizes(min_rows, total, eta):
+    sizes = []
+    rows = min_rows
+    while rows < total:
+        sizes.append(rows)
+        rows *= eta
+    return sizes + [total]
+
+
+def successive_halving(configs, data_dir, min_rows, eta, workers, kernel_cache_rows, log=print):
+    total = len(np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r"))
+    results = {}
+    survivors = list(configs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data_dir,)) as pool:
+        for rung, rows in enumerate(rung_sizes(min_rows, total, eta)):
+            start = time.perf_counter()
+            kernels = {}
+            kernel_seconds = {}
+            try:
+                if rows <= kernel_cache_rows:
+                    for gamma in sorted({c["gamma"] for c in survivors}):
+                        built = time.perf_counter()
+                        kernels[gamma] = kernel_matrix(data_dir, gamma, rows)
+                        kernel_seconds[gamma] = time.perf_counter() - built
+                futures = [
+                    pool.submit(fit_config, config, rows, kernels.get(config["gamma"]))
+                    for config in survivors
+                ]
+                scored = []
+                for config, future in zip(survivors, futures):
+                    result = future.result()
+                    # A shared kernel's build time is split between the configs that used it.
+                    sharing = sum(c["gamma"] == config["gamma"] for c in survivors)
+                    result["kernel_seconds"] = kernel_seconds.get(config["gamma"], 0.0) / sharing
+                    result["rung"] = rung
+                    results[config_key(config)] = result
+                    scored.append(result)
+            finally:
+                for path in kernels.values():
+                    os.remove(path)
+            scored.sort(key=lambda r: r["r2"], reverse=True)
+            best = scored[0]
+            log(f"rung {rung}: {len(survivors)} configs on {rows} rows in {time.perf_counter() - start:.1f}s"
+                f" (best r2 {best['r2']:.4f} at C={best['C']}, gamma={best['gamma']}, epsilon={best['epsilon']})")
+            survivors = [
+                {k: r[k] for k in ("C", "gamma", "epsilon")}
+                for r in scored[:max(1, len(scored) // eta)]
+            ]
+    return sorted(results.values(), key=lambda r: (-r["rung"], -r["r2"]))
+
+
+def config_key(config):
+    return (config["C"], config["gamma"], config["epsilon"])
+
+
+def write_leaderboard(path, leaderboard):
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(leaderboard, f, indent=2)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(leaderboard[0]))
+        writer.writeheader()
+        writer.writerows(leaderboard)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search SVR hyperparameters with successive halving.")
+    parser.add_argument("--data", default=DEFAULTS["data"])
+    parser.add_argument("--C", type=float, nargs="+", default=[100.0, 1000.0, 10000.0])
+    parser.add_argument("--gamma", type=float, nargs="+", default=[0.03, 0.1, 0.3])
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[0.1, 10.0])
+    parser.add_argument("--min-rows", type=int, default=2000, help="subsample size of the first rung")
+    parser.add_argument("--eta", type=int, default=3, help="keep 1/eta of configs and grow rows eta-fold per rung")
+    parser.add_argument("--validation-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--kernel-cache-rows", type=int, default=6000,
+                        help="share precomputed kernel matrices between configs up to this many rows")
+    parser.add_argument("--max-predict-us", type=float, help="latency SLO per row; slower configs are marked")
+    parser.add_argument("--cache-dir", default=".pipeline_cache")
+    parser.add_argument("--output", default="leaderboard.csv", help="CSV or .json leaderboard")
+    args = parser.parse_args()
+
+    pipeline = Pipeline({"data": args.data}, cache_dir=args.cache_dir)
+    data_dir = prepare_data(pipeline, args.cache_dir, args.validation_size, args.seed)
+    configs = [
+        {"C": C, "gamma": gamma, "epsilon": epsilon}
+        for C, gamma, epsilon in itertools.product(args.C, args.gamma, args.epsilon)
+    ]
+    log = lambda message: print(message, file=sys.stderr, flush=True)
+    leaderboard = successive_halving(configs, data_dir, args.min_rows, args.eta, args.workers,
+                                     args.kernel_cache_rows, log=log)
+    for rank, row in enumerate(leaderboard, 1):
+        row["rank"] = rank
+        if args.max_predict_us is not None:
+            row["meets_slo"] = row["predict_us_per_row"] <= args.max_predict_us
+    write_leaderboard(args.output, leaderboard)
+
+    print(f"{'rank':>4} {'C':>8} {'gamma':>6} {'eps':>6} {'rows':>6} {'r2':>7} {'fit s':>8} {'kernel s':>8}"
+          f" {'us/row':>8} {'SVs':>6}")
+    for row in leaderboard:
+        flag = "" if row.get("meets_slo", True) else "  over SLO"
+        print(f"{row['rank']:>4} {row['C']:>8g} {row['gamma']:>6g} {row['epsilon']:>6g} {row['rows']:>6}"
+              f" {row['r2']:>7.4f} {row['fit_seconds']:>8.2f} {row['kernel_seconds']:>8.2f}"
+              f" {row['predict_us_per_row']:>8.1f}"
+              f" {row['support_vectors']:>6}{flag}")
+
+
+if __name__ == "__main__":
+    main()
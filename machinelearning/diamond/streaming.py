@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+
+from fastapi.responses import StreamingResponse
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    # The body generator reads the request stream itself, so the default
+    # disconnect listener would steal its receive() messages.
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _decode(line):
+    try:
+        return line.decode("utf-8"), None
+    except UnicodeDecodeError as exc:
+        return None, f"Invalid UTF-8: {exc}"
+
+
+async def iter_lines(chunks):
+    """Yields (text, error) for each non-blank line; a line that is not
+    valid UTF-8 gets an error instead of ending the stream."""
+    parts = []
+    async for chunk in chunks:
+        # Only the new chunk is split, so a line spread over many chunks
+        # is joined once instead of being rescanned on every chunk.
+        *complete, rest = chunk.split(b"\n")
+        for line in complete:
+            if parts:
+                parts.append(line)
+                line = b"".join(parts)
+                parts = []
+            line = line.rstrip(b"\r")
+            if line.strip():
+                yield _decode(line)
+        if rest:
+            parts.append(rest)
+    pending = b"".join(parts)
+    if pending.strip():
+        yield _decode(pending.rstrip(b"\r"))
+
+
+async def iter_ndjson_records(lines):
+    async for line, error in lines:
+        if error is not None:
+            yield None, error
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield None, "Each line must be a JSON object"
+            continue
+        yield record, None
+
+
+async def iter_csv_records(lines):
+    header = None
+    async for line, error in lines:
+        if error is not None:
+            yield None, error
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield dict(zip(header, values)), None
+
+
+def format_ndjson(index, prediction=None, error=None):
+    if error is not None:
+        return json.dumps({"row": index, "error": error}) + "\n"
+    return json.dumps({"row": index, "predicted_price": prediction}) + "\n"
+
+
+def format_csv(index, prediction=None, error=None):
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow(
+        [index, "" if prediction is None else prediction, error or ""]
+    )
+    return out.getvalue()
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import HERE
+
+os.chdir(HERE)  # the app resolves its model and assets relative to the working directory
+import app as service  # noqa: E402
+
+ROW = {"carat": 0.3, "cut": "Ideal", "color": "E", "clarity": "SI1",
+       "depth": 61.5, "table": 55.0, "x": 4.3, "y": 4.3, "z": 2.65}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(service.app) as client:
+        yield client
+
+
+def test_predict_matches_live_model(client):
+    response = client.post("/predict", json=ROW)
+    assert response.status_code == 200
+    expected = service.registry.live.predict([ROW])[0]
+    assert response.json()["predicted_price"] == pytest.approx(expected)
+
+
+def test_predict_rejects_unknown_category(client):
+    response = client.post("/predict", json={**ROW, "cut": "Unknown"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid value for category field")
+
+
+def test_predict_validates_fields(client):
+    response = client.post("/predict", json={**ROW, "carat": "heavy"})
+    assert response.status_code == 422
+
+
+
+def test_batch_streams_a_result_per_row(client):
+    body = "\n".join([json.dumps(ROW), "not json", json.dumps({**ROW, "cut": "Unknown"}), json.dumps(ROW)])
+    response = client.post("/predict/batch?chunk_size=2", content=body.encode() + b"\n\xff\n",
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["row"] for r in results] == [0, 1, 2, 3, 4]
+    assert results[0]["predicted_price"] == pytest.approx(service.registry.live.predict([ROW])[0])
+    assert results[3] == {**results[0], "row": 3}
+    assert results[1]["error"].startswith("Invalid JSON")
+    assert results[2]["error"].startswith("Invalid value for category field")
+    assert results[4]["error"].startswith("Invalid UTF-8")
+
+
+def test_batch_accepts_csv(client):
+    body = ",".join(ROW) + "\n" + ",".join(str(v) for v in ROW.values()) + "\n"
+    response = client.post("/predict/batch", content=body, headers={"content-type": "text/csv"})
+    header, row = response.text.splitlines()
+    assert header == "row,predicted_price,error"
+    index, price, error = row.split(",")
+    assert (index, error) == ("0", "")
+    assert float(price) == pytest.approx(service.registry.live.predict([ROW])[0])
+
+
+def test_repeated_predictions_are_cached(client):
+    before = client.get("/cache/stats").json()["hits"]
+    row = {**ROW, "carat": 0.41}
+    assert client.post("/predict", json=row).json() == client.post("/predict", json=row).json()
+    assert client.get("/cache/stats").json()["hits"] == before + 1
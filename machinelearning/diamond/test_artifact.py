@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pytest
+
+import artifact
+from artifact import ArtifactError, load_artifact, write_artifact
+from conftest import FEATURES
+from fastencoding import FeatureEncoder
+
+
+def test_artifact_round_trip_matches_pickled_model(bundle, rows, tmp_path):
+    path = str(tmp_path / "model")
+    write_artifact(path, bundle["model"], bundle["encoders"], bundle["scaler"])
+    artifact = load_artifact(path)
+
+    X = FeatureEncoder(bundle["encoders"], bundle["scaler"], FEATURES).transform(rows.to_dict("records"))
+    np.testing.assert_allclose(artifact.model.predict(X), bundle["model"].predict(X), rtol=1e-9, atol=1e-6)
+    for col, encoder in bundle["encoders"].items():
+        assert list(artifact.encoders[col].classes_) == list(encoder.classes_)
+
+
+def test_artifact_detects_corruption(bundle, tmp_path):
+    path = str(tmp_path / "model")
+    write_artifact(path, bundle["model"], bundle["encoders"], bundle["scaler"])
+    with open(tmp_path / "model" / "dual_coef.npy", "r+b") as f:
+        f.seek(-8, 2)
+        f.write(b"\x00" * 8)
+    with pytest.raises(ArtifactError):
+        load_artifact(path)
+
+
+def test_artifact_overwrite_replaces_whole_directory(bundle, tmp_path):
+    path = str(tmp_path / "model")
+    write_artifact(path, bundle["model"], bundle["encoders"], bundle["scaler"], metadata={"n": 1})
+    (tmp_path / "model" / "extra.npy").write_bytes(b"stale")
+    os.makedirs(tmp_path / ".model.tmp-crashed")  # left behind by an interrupted write
+
+    write_artifact(path, bundle["model"], bundle["encoders"], bundle["scaler"], metadata={"n": 2})
+    assert load_artifact(path).manifest["metadata"] == {"n": 2}
+    assert not (tmp_path / "model" / "extra.npy").exists()
+    assert sorted(os.listdir(tmp_path)) == [".model.tmp-crashed", "model"]
+
+
+def test_failed_write_keeps_previous_artifact(bundle, tmp_path, monkeypatch):
+    path = str(tmp_path / "model")
+    write_artifact(path, bundle["model"], bundle["encoders"], bundle["scaler"], metadata={"n": 1})
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(artifact.np, "save", fail)
+    with pytest.raises(OSError):
+        write_artifact(path, bundle["model"], bundle["encoders"], bundle["scaler"], metadata={"n": 2})
+    assert load_artifact(path).manifest["metadata"] == {"n": 1}
+    assert os.listdir(tmp_path) == ["model"]
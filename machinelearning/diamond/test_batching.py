@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from batching import PredictionBatcher
+
+
+def test_batcher_coalesces_concurrent_calls():
+    calls = []
+
+    def predict(batch):
+        calls.append(len(batch))
+        return [row * 2 for row in batch]
+
+    async def run():
+        batcher = PredictionBatcher(predict, max_batch_size=8, max_wait_ms=50)
+        try:
+            return await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == [i * 2 for i in range(20)]
+    assert calls == [8, 8, 4]
+
+
+def test_batcher_propagates_errors_to_the_whole_batch():
+    async def predict(batch):
+        raise RuntimeError("model failed")
+
+    async def run():
+        batcher = PredictionBatcher(predict, max_batch_size=4, max_wait_ms=20)
+        try:
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+            assert all(isinstance(r, RuntimeError) for r in results)
+            # The slot is released, so the batcher keeps serving afterwards.
+            batcher.predict_batch = lambda batch: batch
+            return await batcher.submit(7)
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == 7
+
+
+def test_batcher_stop_fails_queued_rows():
+    release = asyncio.Event()
+
+    async def predict(batch):
+        await release.wait()
+        return batch
+
+    async def run():
+        batcher = PredictionBatcher(predict, max_batch_size=2, max_wait_ms=1000)
+        first = asyncio.ensure_future(batcher.submit(0))  # occupies the only slot
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(batcher.submit(1))
+        queued = [asyncio.ensure_future(batcher.submit(i)) for i in range(2, 5)]
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        release.set()
+        for future in queued:
+            with pytest.raises(RuntimeError, match="stopped"):
+                await asyncio.wait_for(future, 1)
+        return await asyncio.wait_for(asyncio.gather(first, second), 1)
+
+    assert asyncio.run(run()) == [0, 1]
@@ -0,0 +1,33 @@
+import cache as cache_module
+from cache import PredictionCache
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PredictionCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(maxsize=10, ttl=5)
+    cache.put("a", 1)
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_key_rounding_and_version():
+    cache = PredictionCache(round_digits=2, version="v1")
+    assert cache.key({"carat": 0.301, "cut": "Ideal"}) == cache.key({"cut": "Ideal", "carat": 0.299})
+    cache.put(cache.key({"carat": 0.3}), 1)
+    cache.set_version("v2")
+    assert cache.get(cache.key({"carat": 0.3})) is None
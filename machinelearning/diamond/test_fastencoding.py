@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from conftest import FEATURES
+from fastencoding import FeatureEncoder
+
+
+def test_feature_encoder_matches_label_encoders_and_scaler(bundle, rows):
+    expected = rows.copy()
+    for col, encoder in bundle["encoders"].items():
+        expected[col] = encoder.transform(expected[col])
+    expected = bundle["scaler"].transform(expected)
+
+    encoder = FeatureEncoder(bundle["encoders"], bundle["scaler"], FEATURES)
+    records = rows.to_dict("records")
+    np.testing.assert_allclose(encoder.transform(records), expected)
+    np.testing.assert_allclose(encoder.transform_columns({c: rows[c].tolist() for c in FEATURES}), expected)
+    with pytest.raises(ValueError):
+        encoder.check({**records[0], "cut": "Unknown"})
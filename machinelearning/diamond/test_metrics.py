@@ -0,0 +1,43 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+import pytest
+
+from metrics import ERRORS, REQUEST_SECONDS, REQUESTS, MetricsMiddleware
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/slow/{n}")
+async def slow(n: int):
+    async def body():
+        for _ in range(3):
+            await asyncio.sleep(0.05)
+            yield b"x"
+    return StreamingResponse(body())
+
+
+@app.get("/broken")
+async def broken():
+    raise RuntimeError("boom")
+
+
+@pytest.fixture
+def client():
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_streamed_response_is_timed_to_its_last_chunk(client):
+    assert client.get("/slow/1").text == "xxx"
+    counts, total = REQUEST_SECONDS._values[("/slow/{n}",)]
+    assert sum(counts) == 1 and total >= 0.15
+    assert REQUESTS._values[("GET", "/slow/{n}", 200)] == 1
+
+
+def test_unhandled_errors_are_counted(client):
+    assert client.get("/broken").status_code == 500
+    assert REQUESTS._values[("GET", "/broken", 500)] == 1
+    assert ERRORS._values[("/broken", "exception")] == 1
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+from artifact import MANIFEST, ArtifactError
+from registry import ModelRegistry, new_version_path, write_pointer
+
+
+def add_version(root, name, body="{}"):
+    os.makedirs(root / name, exist_ok=True)
+    (root / name / MANIFEST).write_text(body)
+
+
+def load_version(name, path, fingerprint):
+    with open(os.path.join(path, MANIFEST)) as f:
+        if f.read() == "broken":
+            raise ArtifactError(f"cannot load {name}")
+    return SimpleNamespace(id=name, path=path, fingerprint=fingerprint)
+
+
+def test_pointer_files_choose_live_and_candidate(tmp_path):
+    for name in ("v1", "v2", "v3"):
+        add_version(tmp_path, name)
+    os.makedirs(tmp_path / ".v4.tmp-abc")  # an unfinished write
+    registry = ModelRegistry(str(tmp_path), load_version, poll_interval=0)
+    registry.load_initial()
+    assert (registry.live.id, registry.candidate) == ("v3", None)
+
+    (tmp_path / "LIVE").write_text("v1\n")
+    (tmp_path / "CANDIDATE").write_text("v2\n")
+    assert asyncio.run(registry.refresh())
+    assert (registry.live.id, registry.candidate.id) == ("v1", "v2")
+    assert not asyncio.run(registry.refresh())
+
+
+def test_broken_version_keeps_serving_current(tmp_path):
+    add_version(tmp_path, "v1")
+    registry = ModelRegistry(str(tmp_path), load_version, poll_interval=0)
+    registry.load_initial()
+    add_version(tmp_path, "v2", "broken")
+    assert not asyncio.run(registry.refresh())
+    assert (registry.live.id, registry.load_errors) == ("v1", 1)
+
+
+def test_watcher_survives_failed_polls(tmp_path):
+    root = tmp_path / "models"
+    add_version(root, "v1")
+    registry = ModelRegistry(str(root), load_version, poll_interval=0.01)
+    registry.load_initial()
+
+    async def run():
+        await registry.start()
+        try:
+            shutil.rmtree(root)  # discover() now fails on every poll
+            await asyncio.sleep(0.05)
+            add_version(root, "v2")
+            for _ in range(100):
+                if registry.live.id == "v2":
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await registry.stop()
+
+    asyncio.run(run())
+    assert registry.live.id == "v2"
+    assert registry.load_errors > 0
+
+
+@pytest.mark.parametrize("mode, expected", [("canary", ("v2", None)), ("shadow", ("v1", "v2"))])
+def test_route_sends_candidate_traffic_by_mode(tmp_path, mode, expected):
+    add_version(tmp_path, "v1")
+    add_version(tmp_path, "v2")
+    (tmp_path / "LIVE").write_text("v1")
+    (tmp_path / "CANDIDATE").write_text("v2")
+    registry = ModelRegistry(str(tmp_path), load_version, poll_interval=0,
+                             candidate_percent=100, candidate_mode=mode)
+    registry.load_initial()
+    serving, shadow = registry.route()
+    assert (serving.id, shadow.id if shadow else None) == expected
+
+
+def test_new_version_is_not_published_until_a_pointer_names_it(tmp_path):
+    add_version(tmp_path, "v1")
+    path = new_version_path(str(tmp_path))
+    add_version(tmp_path, os.path.basename(path))
+    assert (tmp_path / "LIVE").read_text().strip() == "v1"
+    registry = ModelRegistry(str(tmp_path), load_version, poll_interval=0)
+    registry.load_initial()
+    assert registry.live.id == "v1"
+
+    write_pointer(str(tmp_path), "LIVE", os.path.basename(path))
+    assert asyncio.run(registry.refresh())
+    assert registry.live.path == path
+    assert new_version_path(str(tmp_path)) != path
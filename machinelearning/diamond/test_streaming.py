@@ -0,0 +1,44 @@
+import asyncio
+
+from streaming import iter_csv_records, iter_lines, iter_ndjson_records
+
+
+def collect(records):
+    async def run():
+        return [item async for item in records]
+    return asyncio.run(run())
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def test_lines_are_joined_across_chunks():
+    parts = [b"a" * 10 for _ in range(1000)] + [b"\r\nb\n\n", b"c"]
+    assert collect(iter_lines(chunks(*parts))) == [("a" * 10000, None), ("b", None), ("c", None)]
+
+
+def test_undecodable_line_is_reported_not_raised():
+    lines = collect(iter_lines(chunks(b"ok\n\xff\xfe bad\n", b"caf\xc3", b"\xa9\n")))
+    assert lines[0] == ("ok", None)
+    assert lines[1][0] is None and lines[1][1].startswith("Invalid UTF-8")
+    assert lines[2] == ("café", None)
+
+
+def test_ndjson_records_report_bad_lines():
+    records = collect(iter_ndjson_records(iter_lines(chunks(b'{"a": 1}\nnot json\n[1, 2]\n{"a"', b": 2}\n\xff\n"))))
+    assert records[0] == ({"a": 1}, None)
+    assert records[1][0] is None and records[1][1].startswith("Invalid JSON")
+    assert records[2] == (None, "Each line must be a JSON object")
+    assert records[3] == ({"a": 2}, None)
+    assert records[4][0] is None and records[4][1].startswith("Invalid UTF-8")
+
+
+def test_csv_records_report_bad_rows():
+    records = collect(iter_csv_records(iter_lines(chunks(b"a,b\r\n1,2\n3\n", b'4,"x,y"\n'))))
+    assert records == [
+        ({"a": "1", "b": "2"}, None),
+        (None, "Expected 2 columns, got 1"),
+        ({"a": "4", "b": "x,y"}, None),
+    ]
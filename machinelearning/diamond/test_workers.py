@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import pytest
+
+from artifact import load_artifact
+from conftest import HERE
+from fastencoding import FeatureEncoder
+from workers import Overloaded, WorkerPool
+
+MODEL_PATH = os.path.join(HERE, "diamond_model")
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(1, max_pending=4)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_scores_like_the_artifact(rows):
+    artifact = load_artifact(MODEL_PATH)
+    spec = (MODEL_PATH, artifact.checksum, None)
+    records = rows.head(20).to_dict("records")
+    expected = artifact.model.predict(
+        FeatureEncoder(artifact.encoders, artifact.scaler, artifact.manifest["features"]).transform(records)
+    )
+    pool = WorkerPool(1, max_pending=4, warm_spec=spec)
+    try:
+        assert asyncio.run(pool.run(spec, records)) == pytest.approx(expected.tolist())
+    finally:
+        pool.shutdown()
+
+
+def test_acquire_rejects_when_full_and_sheds_low_priority_work_first(pool):
+    pool.acquire()
+    pool.acquire()
+    with pytest.raises(Overloaded):
+        pool.acquire(reserve=2)
+    pool.acquire()
+    pool.acquire()
+    with pytest.raises(Overloaded):
+        pool.acquire()
+    assert (pool.pending, pool.shed, pool.rejected) == (4, 1, 1)
+
+
+def test_acquire_wait_hands_released_slots_over_in_order(pool):
+    async def run():
+        for _ in range(4):
+            pool.acquire()
+        order = []
+
+        async def wait(name):
+            await pool.acquire_wait()
+            order.append(name)
+
+        first = asyncio.create_task(wait("first"))
+        cancelled = asyncio.create_task(wait("cancelled"))
+        last = asyncio.create_task(wait("last"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert pool.stats()["waiting"] == 2
+
+        pool.release()
+        pool.release()
+        await asyncio.gather(first, last)
+        assert order == ["first", "last"]
+        assert pool.pending == 4  # each released slot went straight to a waiter
+        pool.release()
+        assert pool.pending == 3
+
+    asyncio.run(run())
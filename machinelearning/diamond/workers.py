@@ -0,0 +1,131 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from approx import ApproxSVR
+from artifact import ArtifactError, load_artifact
+from fastencoding import FeatureEncoder
+
+MAX_CACHED_VERSIONS = 4
+
+# Per-process cache of loaded versions. Artifacts are memory-mapped read-only,
+# so every worker shares the same physical pages for the support vectors.
+_versions = {}
+
+
+def _load(spec):
+    loaded = _versions.get(spec)
+    if loaded is None:
+        path, checksum, approx_path = spec
+        artifact = load_artifact(path, verify=False)
+        if artifact.checksum != checksum:
+            raise ArtifactError(f"{path} changed while loading version {checksum[:12]}")
+        encoder = FeatureEncoder(artifact.encoders, artifact.scaler, artifact.manifest["features"])
+        scorer = ApproxSVR.load(approx_path) if approx_path else artifact.model
+        while len(_versions) >= MAX_CACHED_VERSIONS:
+            _versions.pop(next(iter(_versions)))
+        loaded = _versions[spec] = (encoder, scorer)
+    return loaded
+
+
+def _warm(spec):
+    if spec is not None:
+        _load(spec)
+
+
+def score(spec, rows):
+    encoder, scorer = _load(spec)
+    return [float(p) for p in scorer.predict(encoder.transform(rows))]
+
+
+class Overloaded(Exception):
+    pass
+
+
+class WorkerPool:
+    """Process pool for CPU-bound scoring with a bounded number of pending requests."""
+
+    def __init__(self, processes, max_pending, warm_spec=None):
+        self.processes = int(processes)
+        self.max_pending = int(max_pending)
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.shed = 0
+        self._waiters = deque()
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm,
+            initargs=(warm_spec,),
+        )
+
+    @property
+    def full(self):
+        return self.pending >= self.max_pending
+
+    def acquire(self, reserve=0):
+        """Takes a pending slot or raises Overloaded.
+
+        `reserve` slots are left free for other work, so best-effort callers
+        (shadow scoring) are shed before the pool is full.
+        """
+        if self.pending + reserve >= self.max_pending:
+            if reserve:
+                self.shed += 1
+            else:
+                self.rejected += 1
+            raise Overloaded(f"{self.pending} requests already pending")
+        self.pending += 1
+
+    async def acquire_wait(self):
+        """Like acquire(), but waits for a free slot instead of raising.
+
+        For streamed batches, which cannot answer 503 once their body has
+        started; waiting here keeps them out of the executor's own queue.
+        Waiters are served in order, each handed the slot a release() frees.
+        """
+        if not self.full and not self._waiters:
+            self.pending += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._free()  # the slot arrived as we were cancelled
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        self.completed += 1
+        self._free()
+
+    def _free(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # hand the slot over; pending is unchanged
+                return
+        self.pending -= 1
+
+    async def run(self, spec, rows):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, score, spec, rows)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "processes": self.processes,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "waiting": len(self._waiters),
+        }
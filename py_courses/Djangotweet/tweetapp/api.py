@@ -0,0 +1,166 @@
+import hashlib
+import json
+
+from django.db import transaction
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition, require_http_methods
+
+from tweetapp import push, search, timeline
+from tweetapp.models import Tweet
+from tweetapp.pagination import InvalidCursor, paginate
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_BULK = 1000
+STREAM_BACKLOG = 100
+
+
+def serialize(tweet):
+    return {
+        "id": tweet.id,
+        "username": tweet.username.username if tweet.username_id else None,
+        "message": tweet.message,
+        "created_at": tweet.created_at.isoformat(),
+    }
+
+
+def error(message, status=400):
+    return JsonResponse({"error": message}, status=status)
+
+
+def timeline_etag(request):
+    # Read from the database, not the cache, so every worker process agrees.
+    # The newest id and timestamp move on inserts and the count on deletes.
+    # Separate queries keep each one on an index: SQLite only uses its
+    # MIN/MAX shortcut for a lone aggregate (one combined query scans the table).
+    count = Tweet.objects.count()
+    newest_id = Tweet.objects.aggregate(Max("id"))["id__max"] or 0
+    newest = Tweet.objects.aggregate(Max("created_at"))["created_at__max"]
+    query = hashlib.sha256(request.GET.urlencode().encode()).hexdigest()[:12]
+    return f"{count}-{newest_id}-{newest.timestamp() if newest else 0:.6f}-{query}"
+
+
+@require_http_methods(["GET", "HEAD", "POST", "DELETE"])
+@condition(etag_func=timeline_etag)
+def tweets(request):
+    if request.method in ("GET", "HEAD"):
+        return list_tweets(request)
+    if not request.user.is_authenticated:
+        return error("Authentication required", status=401)
+    try:
+        body = json.loads(request.body or b"{}")
+    except ValueError:
+        return error("Body must be JSON")
+    if request.method == "POST":
+        return create_tweets(request, body)
+    return delete_tweets(request, body)
+
+
+def list_tweets(request):
+    try:
+        limit = min(int(request.GET.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+    except ValueError:
+        return error("limit must be an integer")
+    if limit < 1:
+        return error("limit must be positive")
+    try:
+        page, next_cursor = paginate(Tweet.objects.select_related("username"),
+                                     request.GET.get("cursor"), limit)
+    except InvalidCursor:
+        return error("Invalid cursor")
+    return JsonResponse({"results": [serialize(t) for t in page], "next_cursor": next_cursor})
+
+
+def create_tweets(request, body):
+    """Creates every tweet in one INSERT, or none of them if any is invalid."""
+    items = body.get("tweets") if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        return error('Expected a non-empty list of tweets or {"tweets": [...]}')
+    if len(items) > MAX_BULK:
+        return error(f"At most {MAX_BULK} tweets per request")
+
+    now = timezone.now()
+    new_tweets = []
+    max_length = Tweet._meta.get_field("message").max_length
+    for i, item in enumerate(items):
+        message = item.get("message") if isinstance(item, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            return error(f"tweets[{i}]: message is required")
+        if len(message) > max_length:
+            return error(f"tweets[{i}]: message is longer than {max_length} characters")
+        new_tweets.append(Tweet(username=request.user, message=message, created_at=now))
+
+    with transaction.atomic():
+        created = Tweet.objects.bulk_create(new_tweets)
+    # bulk_create skips post_save, so invalidate and publish here.
+    timeline.tweets_added(created)
+    for tweet in created:
+        push.broker.publish(serialize(tweet))
+    return JsonResponse({"results": [serialize(t) for t in created]}, status=201)
+
+
+def delete_tweets(request, body):
+    """Deletes the requesting user's tweets matching ``ids`` and/or ``before``.
+
+    Send ``If-Match`` with a listing ETag to delete only if the timeline has
+    not changed since it was read; a stale tag gets 412.
+    """
+    if not isinstance(body, dict) or not ("ids" in body or "before" in body):
+        return error('Expected {"ids": [...]} and/or {"before": "<ISO datetime>"}')
+    tweets = Tweet.objects.filter(username=request.user)
+    if "ids" in body:
+        ids = body["ids"]
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return error("ids must be a list of integers")
+        tweets = tweets.filter(id__in=ids)
+    if "before" in body:
+        before = parse_datetime(str(body["before"]))
+        if before is None:
+            return error("before must be an ISO datetime")
+        tweets = tweets.filter(created_at__lt=before)
+    with transaction.atomic():
+        deleted = tweets.delete()[1].get(Tweet._meta.label, 0)
+    return JsonResponse({"deleted": deleted})
+
+
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=timeline_etag)
+def search_tweets(request):
+    text = request.GET.get("q", "").strip()
+    if not text:
+        return error("q is required")
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        return error("page must be an integer")
+    if not 1 <= page <= search.MAX_PAGE:
+        return error(f"page must be between 1 and {search.MAX_PAGE}")
+    found, has_next = search.search(text, page)
+    return JsonResponse({
+        "results": [{**serialize(t), "rank": getattr(t, "rank", None)} for t in found],
+        "next_page": page + 1 if has_next and page < search.MAX_PAGE else None,
+    })
+
+
+@require_http_methods(["GET"])
+async def stream(request):
+    """Server-sent events for new tweets; needs an ASGI server such as uvicorn.
+
+    Reconnecting clients send Last-Event-ID and first receive up to
+    STREAM_BACKLOG tweets they missed.
+    """
+    load_backlog = None
+    last_id = request.headers.get("Last-Event-ID", "")
+    if last_id.isdigit():
+        missed = Tweet.objects.select_related("username").filter(id__gt=int(last_id)).order_by("id")
+
+        async def load_backlog():
+            return [serialize(tweet) async for tweet in missed[:STREAM_BACKLOG]]
+
+    response = StreamingHttpResponse(push.event_stream(load_backlog), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TweetappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tweetapp"
+
+    def ready(self):
+        from tweetapp import signals  # noqa: F401
@@ -0,0 +1,42 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand
+
+from tweetapp.models import Tweet
+from tweetapp.tweetio import FIELDS, Progress, detect_format, open_stream
+
+
+class Command(BaseCommand):
+    help = "Stream every tweet to NDJSON or CSV (username, message, created_at), oldest first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='output file, or "-" for stdout')
+        parser.add_argument("--format", choices=["ndjson", "csv"], help="defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        fmt = detect_format(options["path"], options["format"])
+        rows = (
+            Tweet.objects.order_by("id")
+            .values_list("username__username", "message", "created_at")
+            .iterator(chunk_size=options["chunk_size"])
+        )
+        progress = Progress(self.stderr, "exported")
+        with open_stream(options["path"], "w") as stream:
+            writer = csv.writer(stream) if fmt == "csv" else None
+            if writer:
+                writer.writerow(FIELDS)
+            pending = 0
+            for username, message, created_at in rows:
+                if writer:
+                    writer.writerow([username or "", message, created_at.isoformat()])
+                else:
+                    stream.write(json.dumps({"username": username, "message": message,
+                                             "created_at": created_at.isoformat()}) + "\n")
+                pending += 1
+                if pending == options["chunk_size"]:
+                    progress.update(pending)
+                    pending = 0
+            progress.update(pending)
+        progress.finish()
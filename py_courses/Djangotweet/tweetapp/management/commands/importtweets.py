@@ -0,0 +1,103 @@
+import csv
+import json
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tweetapp import timeline
+from tweetapp.models import Tweet
+from tweetapp.tweetio import Progress, detect_format, open_stream
+
+
+def read_records(stream, fmt):
+    """Yields one dict per row, or None for an NDJSON line that is not a JSON object."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            yield record if isinstance(record, dict) else None
+
+
+def parse_created_at(value, default):
+    if not value:
+        return default
+    if not isinstance(value, str):
+        return None
+    try:
+        created_at = parse_datetime(value)
+    except ValueError:  # well-formed but out of range, e.g. month 13
+        return None
+    if created_at is not None and timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at, dt_timezone.utc)
+    return created_at
+
+
+class Command(BaseCommand):
+    help = "Stream tweets from NDJSON or CSV (username, message, created_at) into the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='input file, or "-" for stdin')
+        parser.add_argument("--format", choices=["ndjson", "csv"], help="defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--create-users", action="store_true",
+                            help="create missing users (without a usable password) instead of skipping their tweets")
+
+    def handle(self, *args, **options):
+        fmt = detect_format(options["path"], options["format"])
+        max_length = Tweet._meta.get_field("message").max_length
+        progress = Progress(self.stderr, "imported")
+        skipped = 0
+
+        with open_stream(options["path"], "r") as stream:
+            records = read_records(stream, fmt)
+            while True:
+                batch = list(islice(records, options["batch_size"]))
+                if not batch:
+                    break
+                # One user lookup per batch; only this batch's users are held in memory.
+                names = {record["username"] for record in batch
+                         if record and record.get("username") and isinstance(record["username"], str)}
+                users = User.objects.in_bulk(names, field_name="username")
+                if options["create_users"] and len(users) < len(names):
+                    User.objects.bulk_create(
+                        [User(username=name, password="!") for name in names - users.keys()],
+                        ignore_conflicts=True,
+                    )
+                    users = User.objects.in_bulk(names, field_name="username")
+
+                tweets = []
+                now = timezone.now()
+                for record in batch:
+                    if record is None:
+                        skipped += 1
+                        continue
+                    username, message = record.get("username"), record.get("message")
+                    # An empty username is a tweet whose user was deleted; exporttweets
+                    # writes those as null (NDJSON) or "" (CSV) and they import as such.
+                    anonymous = username is None or username == ""
+                    user = users.get(username) if isinstance(username, str) else None
+                    created_at = parse_created_at(record.get("created_at"), now)
+                    if ((user is None and not anonymous) or not isinstance(message, str) or not message
+                            or len(message) > max_length or created_at is None):
+                        skipped += 1
+                        continue
+                    tweets.append(Tweet(username=user, message=message, created_at=created_at))
+                with transaction.atomic():
+                    Tweet.objects.bulk_create(tweets)
+                progress.update(len(tweets))
+
+        if progress.rows:
+            timeline.tweets_imported()
+        progress.finish()
+        if skipped:
+            self.stderr.write(f"skipped {skipped} rows that were malformed or had an unknown user, bad date or invalid message")
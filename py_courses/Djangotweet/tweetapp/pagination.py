@@ -0,0 +1,40 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(tweet):
+    raw = f"{tweet.created_at.isoformat()}|{tweet.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(id)
+    except ValueError as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def paginate(queryset, cursor=None, page_size=20):
+    """Keyset pagination over newest-first tweets.
+
+    Returns the page and the cursor for the next (older) page, or None on the
+    last page. Seeking by (created_at, id) uses tweet_newest_first_idx, so
+    deep pages cost the same as the first one.
+    """
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=id)
+        )
+    page = list(queryset.order_by("-created_at", "-id")[:page_size + 1])
+    if len(page) > page_size:
+        return page[:page_size], encode_cursor(page[page_size - 1])
+    return page, None
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+BUFFER_SIZE = 64
+HEARTBEAT_SECONDS = 15
+
+
+class Subscriber:
+    """One connected client: a bounded buffer owned by its event loop.
+
+    When a slow client's buffer is full the oldest message is dropped and
+    counted, and the client is told to resync instead of growing memory.
+    """
+
+    def __init__(self, loop, maxsize=BUFFER_SIZE):
+        self.loop = loop
+        self.buffer = deque()
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.ready = asyncio.Event()
+
+    def put(self, message):
+        if len(self.buffer) >= self.maxsize:
+            self.buffer.popleft()
+            self.dropped += 1
+        self.buffer.append(message)
+        self.ready.set()
+
+    async def get(self, timeout=None):
+        """Returns (messages, dropped) once something arrives, or ([], 0) on timeout."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return [], 0
+        self.ready.clear()
+        messages, dropped = list(self.buffer), self.dropped
+        self.buffer.clear()
+        self.dropped = 0
+        return messages, dropped
+
+
+class Broker:
+    """In-process pub/sub for new tweets.
+
+    publish() may be called from any thread (sync views run in worker
+    threads under ASGI); delivery hops onto each subscriber's loop. Only
+    clients connected to this process are reached, so run a single worker
+    or put a shared broker in front when scaling out.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxsize=BUFFER_SIZE):
+        subscriber = Subscriber(asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.put, message)
+            except RuntimeError:  # loop already closed
+                self.unsubscribe(subscriber)
+
+
+broker = Broker()
+
+
+def sse(event, data, id=None):
+    lines = [f"id: {id}"] if id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(load_backlog=None):
+    """Yields SSE frames for new tweets, preceded by ``await load_backlog()``.
+
+    The subscription is taken here rather than in the view so it only
+    exists while the body is being iterated, and the finally below always
+    drops it. It starts before the backlog query, so a tweet can show up in
+    both; the backlog copy wins.
+    """
+    subscriber = broker.subscribe()
+    try:
+        backlog = await load_backlog() if load_backlog else []
+        sent = {tweet["id"] for tweet in backlog}
+        for tweet in backlog:
+            yield sse("tweet", tweet, id=tweet["id"])
+        while True:
+            messages, dropped = await subscriber.get(timeout=HEARTBEAT_SECONDS)
+            if dropped:
+                yield sse("resync", {"dropped": dropped})
+            for tweet in messages:
+                if tweet["id"] not in sent:
+                    yield sse("tweet", tweet, id=tweet["id"])
+            if not messages and not dropped:
+                yield ": keepalive\n\n"
+    finally:
+        broker.unsubscribe(subscriber)
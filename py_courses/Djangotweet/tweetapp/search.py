@@ -0,0 +1,64 @@
+import re
+
+from django.db import connection
+
+from tweetapp.models import Tweet
+
+PAGE_SIZE = 20
+MAX_PAGE = 50
+
+# bm25 is only computed for the newest RANK_WINDOW matches: scoring every
+# match of a very common word costs over a second at 1M tweets, and results
+# past MAX_PAGE are never shown anyway.
+RANK_WINDOW = PAGE_SIZE * MAX_PAGE
+
+FTS_SQL = """
+    SELECT rowid, rank FROM (
+        SELECT rowid, bm25(tweetapp_tweet_fts) AS rank
+        FROM tweetapp_tweet_fts
+        WHERE tweetapp_tweet_fts MATCH %s
+        ORDER BY rowid DESC
+        LIMIT %s
+    )
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+
+
+def fts_query(text):
+    """Turns free text into an FTS5 query where every word must match.
+
+    Words are quoted so FTS5 operators in the input are matched literally;
+    a trailing ``*`` on a word keeps it as a prefix search.
+    """
+    terms = [f'"{word}"{star}' for word, star in re.findall(r"(\w+)(\*?)", text)]
+    return " ".join(terms) or None
+
+
+def search(text, page=1, page_size=PAGE_SIZE):
+    """Returns (tweets, has_next) for a 1-based page, best matches first.
+
+    On SQLite this uses the FTS5 index from migration 0004 and ranks by
+    bm25; other databases fall back to an unranked icontains scan.
+    """
+    query = fts_query(text)
+    if query is None:
+        return [], False
+    offset = (page - 1) * page_size
+    if connection.vendor != "sqlite":
+        tweets = Tweet.objects.select_related("username")
+        for word in re.findall(r"\w+", text):
+            tweets = tweets.filter(message__icontains=word)
+        found = list(tweets[offset:offset + page_size + 1])
+        return found[:page_size], len(found) > page_size
+
+    with connection.cursor() as cursor:
+        cursor.execute(FTS_SQL, [query, RANK_WINDOW, page_size + 1, offset])
+        ranked = cursor.fetchall()
+    by_id = Tweet.objects.select_related("username").in_bulk([id for id, _ in ranked[:page_size]])
+    found = []
+    for id, rank in ranked[:page_size]:
+        if id in by_id:
+            by_id[id].rank = rank
+            found.append(by_id[id])
+    return found, len(ranked) > page_size
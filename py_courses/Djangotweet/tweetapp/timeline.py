@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from tweetapp.models import Tweet
+
+VERSION_KEY = "tweetapp:timeline:version"
+STATS_KINDS = ("page", "card")
+
+
+def card_key(tweet_id):
+    return f"tweetapp:card:{tweet_id}"
+
+
+def page_key(cursor):
+    # Pages are keyed by the timeline version so a delete can drop every page at once.
+    version = cache.get_or_set(VERSION_KEY, 1, timeout=None)
+    return f"tweetapp:page:{version}:{cursor or ''}"
+
+
+def record(kind, hits=0, misses=0):
+    for outcome, count in (("hit", hits), ("miss", misses)):
+        if count:
+            key = f"tweetapp:stats:{kind}:{outcome}"
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, count)
+
+
+def stats():
+    counts = cache.get_many([f"tweetapp:stats:{kind}:{outcome}"
+                             for kind in STATS_KINDS for outcome in ("hit", "miss")])
+    report = {}
+    for kind in STATS_KINDS:
+        hits = counts.get(f"tweetapp:stats:{kind}:hit", 0)
+        misses = counts.get(f"tweetapp:stats:{kind}:miss", 0)
+        total = hits + misses
+        report[kind] = {"hits": hits, "misses": misses,
+                        "hit_ratio": hits / total if total else None}
+    return report
+
+
+def get_page(cursor):
+    page = cache.get(page_key(cursor))
+    record("page", hits=page is not None, misses=page is None)
+    return page
+
+
+def set_page(cursor, content):
+    cache.set(page_key(cursor), content)
+
+
+def render_cards(tweets):
+    """Returns (tweet, html) pairs, rendering only the cards missing from the cache.
+
+    Cards hold the author and message only; the per-user Delete button is
+    rendered around them so one cached card serves every viewer.
+    """
+    keys = [card_key(tweet.id) for tweet in tweets]
+    cached = cache.get_many(keys)
+    missing = {}
+    cards = []
+    for key, tweet in zip(keys, tweets):
+        html = cached.get(key)
+        if html is None:
+            html = missing[key] = render_to_string("tweetapp/tweetcard.html", {"tweet": tweet})
+        cards.append((tweet, mark_safe(html)))
+    if missing:
+        cache.set_many(missing)
+    record("card", hits=len(cached), misses=len(missing))
+    return cards
+
+
+def tweets_added(tweets):
+    # Cursor pages are anchored to an older tweet, so a new newest tweet only
+    # changes the first page. Backdated tweets can land anywhere.
+    oldest = min(tweet.created_at for tweet in tweets)
+    if Tweet.objects.filter(created_at__gt=oldest).exclude(pk__in=[t.pk for t in tweets]).exists():
+        invalidate_pages()
+    else:
+        cache.delete(page_key(None))
+
+
+def tweets_imported():
+    invalidate_pages()
+
+
+def tweets_deleted(tweet_ids):
+    cache.delete_many([card_key(tweet_id) for tweet_id in tweet_ids])
+    invalidate_pages()
+
+
+def invalidate_pages():
+    cache.add(VERSION_KEY, 1, timeout=None)
+    cache.incr(VERSION_KEY)
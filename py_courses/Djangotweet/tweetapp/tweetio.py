@@ -0,0 +1,37 @@
+import sys
+import time
+from contextlib import nullcontext
+
+FIELDS = ["username", "message", "created_at"]
+
+
+def open_stream(path, mode):
+    if path == "-":
+        return nullcontext(sys.stdin if "r" in mode else sys.stdout)
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return "csv" if path.endswith(".csv") else "ndjson"
+
+
+class Progress:
+    def __init__(self, stream, label):
+        self.stream = stream
+        self.label = label
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed else 0.0
+
+    def update(self, rows):
+        self.rows += rows
+        self.stream.write(f"\r{self.label} {self.rows} rows ({self.rate():,.0f} rows/s)", ending="")
+
+    def finish(self):
+        self.stream.write(f"\r{self.label} {self.rows} rows in {time.perf_counter() - self.started:.1f}s"
+                          f" ({self.rate():,.0f} rows/s)")
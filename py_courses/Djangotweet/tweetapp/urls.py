@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'tweetapp'
 
@@ -9,5 +9,10 @@ urlpatterns = [
     path('addtweetbyform',views.addtweetbyform,name='addtweetbyform'), #atilsamancioglu.com/tweetapp/addtweetbyform
     path('addtweetbymodelform',views.addtweetbymodelform,name='addtweetbymodelform'),
     path('signup/',views.SignUpView.as_view(),name="signup"),
-    path('deletetweet/<int:id>',views.deletetweet,name="deletetweet")
+    path('deletetweet/<int:id>',views.deletetweet,name="deletetweet"),
+    path('cachestats/',views.cachestats,name="cachestats"),
+    path('search/',views.searchtweet,name="searchtweet"),
+    path('api/tweets/',api.tweets,name="api_tweets"),
+    path('api/search/',api.search_tweets,name="api_search"),
+    path('api/stream/',api.stream,name="api_stream"),
 ]
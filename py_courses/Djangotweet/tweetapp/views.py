@@ -1,16 +1,63 @@
 from django.shortcuts import render, redirect
-from . import models
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from . import models, search, timeline
+from .pagination import InvalidCursor, paginate
 from django.urls import reverse, reverse_lazy
 from tweetapp.forms import AddTweetForm, AddTweetModelForm
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic import CreateView
 # Create your views here.
 
+TWEETS_PER_PAGE = 20
+
 def listtweet(request):
-    all_tweets = models.Tweet.objects.all()
-    tweet_dict = {"tweets":all_tweets}
-    return render(request,'tweetapp/listtweet.html',context=tweet_dict)
+    cursor = request.GET.get("cursor")
+    # Anonymous visitors all see the same page, so it is cached whole;
+    # logged-in users reuse the cached cards but get their own Delete buttons.
+    anonymous = not request.user.is_authenticated
+    if anonymous:
+        content = timeline.get_page(cursor)
+        if content is not None:
+            response = HttpResponse(content)
+            response["X-Cache"] = "HIT"
+            return response
+
+    tweets = models.Tweet.objects.select_related("username")
+    try:
+        page, next_cursor = paginate(tweets, cursor, TWEETS_PER_PAGE)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    tweet_dict = {"tweets":page, "cards":timeline.render_cards(page), "next_cursor":next_cursor}
+    response = render(request,'tweetapp/listtweet.html',context=tweet_dict)
+    if anonymous:
+        timeline.set_page(cursor, response.content)
+        response["X-Cache"] = "MISS"
+    return response
+
+def search_page(request):
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        page = 1
+    return max(1, min(page, search.MAX_PAGE))
+
+def searchtweet(request):
+    text = request.GET.get("q", "").strip()
+    page = search_page(request)
+    found, has_next = search.search(text, page)
+    search_dict = {
+        "q":text,
+        "cards":timeline.render_cards(found),
+        "page":page,
+        "next_page":page + 1 if has_next and page < search.MAX_PAGE else None,
+    }
+    return render(request,'tweetapp/searchtweet.html',context=search_dict)
+
+@user_passes_test(lambda user: user.is_staff, login_url="/login")
+def cachestats(request):
+    return JsonResponse(timeline.stats())
 
 @login_required(login_url="/login")
 def addtweet(request):
@@ -28,8 +75,12 @@ def addtweetbyform(request):
         if form.is_valid():
             nickname = form.cleaned_data["nickname_input"]
             message = form.cleaned_data["message_input"]
-            models.Tweet.objects.create(nickname=nickname, message = message)
-            return redirect(reverse('tweetapp:listtweet'))
+            user = User.objects.filter(username=nickname).first()
+            if user is not None:
+                models.Tweet.objects.create(username=user, message = message)
+                return redirect(reverse('tweetapp:listtweet'))
+            form.add_error("nickname_input", "No user with this nickname.")
+            return render(request,'tweetapp/addtweetbyform.html', context={"form":form})
         else:
             print("error in form!")
             return render(request,'tweetapp/addtweetbyform.html', context={"form":form})
@@ -41,9 +92,7 @@ def addtweetbymodelform(request):
     if request.method == "POST":
         form = AddTweetModelForm(request.POST)
         if form.is_valid():
-            nickname = form.cleaned_data["nickname"]
-            message = form.cleaned_data["message"]
-            models.Tweet.objects.create(nickname=nickname, message = message)            
+            form.save()
             return redirect(reverse('tweetapp:listtweet'))
         else:
             print("error in form!")
@@ -60,7 +109,7 @@ class SignUpView(CreateView):
 
 @login_required
 def deletetweet(request, id):
-   tweet = models.Tweet.objects.get(pk=id)
-   if request.user == tweet.username:
-      models.Tweet.objects.filter(id=id).delete()
-      return redirect('tweetapp:listtweet')
\ No newline at end of file
+   deleted, _ = models.Tweet.objects.filter(id=id, username=request.user).delete()
+   if not deleted:
+      raise Http404("No such tweet of yours")
+   return redirect('tweetapp:listtweet')
\ No newline at end of file
@@ -0,0 +1,189 @@
+import argparse
+import email.utils
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pandas as pd
+
+API_URL = "https://api.spotify.com/v1"
+PAGE_SIZE = 100  # playlist items per page (API maximum)
+FEATURES_BATCH = 100  # ids per audio-features call (API maximum)
+FEATURE_COLUMNS = ["danceability", "energy", "valence", "tempo"]
+ITEM_FIELDS = "next,items(added_by.id,track(id,name,artists(name)))"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SpotifyError(Exception):
+    pass
+
+
+def retry_after(value, default):
+    """Seconds to wait from a Retry-After header, in either delta-seconds or HTTP-date form."""
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return default
+
+
+class SpotifyClient:
+    """Thread-safe Web API client with retries.
+
+    `token` is a string or a callable returning one, so a spotipy auth
+    manager can refresh it. A 429 pauses every thread sharing the client
+    for the Retry-After interval, since the limit is per app, not per call;
+    other failures back off exponentially with jitter.
+    """
+
+    def __init__(self, token, base_url=API_URL, retries=6, backoff=0.5, max_backoff=30.0, timeout=10.0):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.http = httpx.Client(timeout=timeout)
+        self.calls = 0
+        self.throttled = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.http.close()
+
+    def get(self, path, params=None):
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.retries + 1):
+            self._wait()
+            token = self.token() if callable(self.token) else self.token
+            with self._lock:
+                self.calls += 1
+            try:
+                response = self.http.get(url, params=params, headers={"Authorization": f"Bearer {token}"})
+            except httpx.TransportError as exc:
+                if attempt == self.retries:
+                    raise SpotifyError(f"GET {url} failed: {exc}") from exc
+                time.sleep(self._delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES:
+                if response.is_error:
+                    raise SpotifyError(f"GET {url} returned {response.status_code}: {response.text[:200]}")
+                return response.json()
+            if attempt == self.retries:
+                raise SpotifyError(f"GET {url} still returned {response.status_code} after {self.retries} retries")
+            if response.status_code == 429:
+                self._pause(retry_after(response.headers.get("Retry-After"), self._delay(attempt)))
+            else:
+                time.sleep(self._delay(attempt))
+
+    def _delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _pause(self, seconds):
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _wait(self):
+        while (remaining := self._paused_until - time.monotonic()) > 0:
+            time.sleep(remaining)
+
+
+def playlist_snapshot(client, playlist_id):
+    """The playlist's snapshot_id, which changes whenever its tracks do."""
+    return client.get(f"playlists/{playlist_id}", {"fields": "snapshot_id"})["snapshot_id"]
+
+
+def playlist_items(client, playlist_id):
+    """Yields every item of a playlist, following the `next` links."""
+    page = client.get(f"playlists/{playlist_id}/tracks", {"limit": PAGE_SIZE, "fields": ITEM_FIELDS})
+    while True:
+        yield from page["items"]
+        if not page.get("next"):
+            return
+        page = client.get(page["next"])
+
+
+def audio_features(client, track_ids):
+    """Returns {track id: features} for the ids, FEATURES_BATCH per call."""
+    ids = list(dict.fromkeys(track_ids))
+    features = {}
+    for start in range(0, len(ids), FEATURES_BATCH):
+        batch = ids[start:start + FEATURES_BATCH]
+        for row in client.get("audio-features", {"ids": ",".join(batch)})["audio_features"]:
+            if row:  # null for tracks without analysis
+                features[row["id"]] = row
+    return features
+
+
+def playlist_tracks(client, playlist_id):
+    rows = []
+    for item in playlist_items(client, playlist_id):
+        track = item["track"]
+        if track and track["id"]:  # local files and removed tracks have no id
+            rows.append({
+                "playlist_id": playlist_id,
+                "id": track["id"],
+                "name": track["name"],
+                "artist": track["artists"][0]["name"] if track["artists"] else None,
+                "added_by": (item.get("added_by") or {}).get("id"),
+            })
+    return rows
+
+
+def harvest(client, playlist_ids, workers=8):
+    """Fetches the playlists concurrently and joins their tracks with audio features.
+
+    Features are requested once per distinct track across all playlists.
+    """
+    with ThreadPoolExecutor(workers) as pool:
+        rows = [row for rows in pool.map(lambda p: playlist_tracks(client, p), playlist_ids) for row in rows]
+        ids = list(dict.fromkeys(row["id"] for row in rows))
+        chunks = [ids[i:i + FEATURES_BATCH] for i in range(0, len(ids), FEATURES_BATCH)]
+        features = {}
+        for found in pool.map(lambda chunk: audio_features(client, chunk), chunks):
+            features.update(found)
+
+    df = pd.DataFrame(rows, columns=["playlist_id", "id", "name", "artist", "added_by"])
+    features_df = pd.DataFrame(list(features.values()), columns=["id"] + FEATURE_COLUMNS)
+    return pd.merge(df, features_df, on="id", how="left")
+
+
+def oauth_token():
+    from spotipy.oauth2 import SpotifyOAuth
+
+    auth_manager = SpotifyOAuth(scope="playlist-read-private playlist-read-collaborative", open_browser=False)
+    return lambda: auth_manager.get_access_token(as_dict=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harvest Spotify playlists with their audio features.")
+    parser.add_argument("playlists", nargs="+", help="playlist ids")
+    parser.add_argument("--output", default="tracks.csv")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--base-url", default=os.environ.get("SPOTIFY_API_URL", API_URL))
+    parser.add_argument("--token", default=os.environ.get("SPOTIFY_TOKEN"),
+                        help="bearer token; otherwise SpotifyOAuth reads the SPOTIPY_* variables")
+    args = parser.parse_args()
+
+    client = SpotifyClient(args.token or oauth_token(), base_url=args.base_url)
+    started = time.perf_counter()
+    try:
+        final_df = harvest(client, args.playlists, workers=args.workers)
+    finally:
+        client.close()
+    final_df.to_csv(args.output, index=False)
+    print(f"{len(final_df)} tracks from {len(args.playlists)} playlists in {time.perf_counter() - started:.1f}s "
+          f"({client.calls} calls, {client.throttled} rate limited) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from harvester import (API_URL, FEATURE_COLUMNS, FEATURES_BATCH, SpotifyClient, audio_features, oauth_token,
+                       playlist_snapshot, playlist_tracks)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS playlists (
+    id TEXT PRIMARY KEY,
+    snapshot_id TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS playlist_tracks (
+    playlist_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    track_id TEXT NOT NULL,
+    added_by TEXT,
+    PRIMARY KEY (playlist_id, position)
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    artist TEXT
+);
+CREATE TABLE IF NOT EXISTS features (
+    id TEXT PRIMARY KEY,
+    danceability REAL,
+    energy REAL,
+    valence REAL,
+    tempo REAL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+class TrackStore:
+    """SQLite cache of playlists, tracks and audio features, keyed by Spotify id.
+
+    A track whose features came back null is stored with empty columns so it
+    is not requested again.
+    """
+
+    def __init__(self, path="spotify_cache.sqlite3"):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def snapshots(self):
+        return dict(self.db.execute("SELECT id, snapshot_id FROM playlists"))
+
+    def save_playlist(self, playlist_id, snapshot_id, rows):
+        with self.db:
+            self.db.execute("DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,))
+            self.db.executemany("INSERT INTO playlist_tracks VALUES (?, ?, ?, ?)",
+                                [(playlist_id, i, row["id"], row["added_by"]) for i, row in enumerate(rows)])
+            self.db.executemany("INSERT OR REPLACE INTO tracks VALUES (?, ?, ?)",
+                                [(row["id"], row["name"], row["artist"]) for row in rows])
+            self.db.execute("INSERT OR REPLACE INTO playlists VALUES (?, ?, ?)", (playlist_id, snapshot_id, time.time()))
+
+    def missing_features(self, playlist_ids):
+        """Track ids on the playlists that have never had features fetched."""
+        if not playlist_ids:
+            return []
+        return [track_id for (track_id,) in self.db.execute(
+            "SELECT DISTINCT pt.track_id FROM playlist_tracks pt LEFT JOIN features f ON f.id = pt.track_id"
+            f" WHERE f.id IS NULL AND pt.playlist_id IN ({','.join('?' * len(playlist_ids))})", playlist_ids)]
+
+    def save_features(self, track_ids, features):
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?)",
+                [(track_id, *(features.get(track_id, {}).get(c) for c in FEATURE_COLUMNS), now)
+                 for track_id in track_ids])
+
+    def frame(self, playlist_ids):
+        """Same columns as harvester.harvest(), read from the cache."""
+        if not playlist_ids:
+            return pd.DataFrame(columns=["playlist_id", "id", "name", "artist", "added_by"] + FEATURE_COLUMNS)
+        return pd.read_sql_query(
+            "SELECT pt.playlist_id, t.id, t.name, t.artist, pt.added_by,"
+            f" {', '.join('f.' + c for c in FEATURE_COLUMNS)}"
+            " FROM playlist_tracks pt JOIN tracks t ON t.id = pt.track_id LEFT JOIN features f ON f.id = t.id"
+            f" WHERE pt.playlist_id IN ({','.join('?' * len(playlist_ids))})"
+            " ORDER BY pt.playlist_id, pt.position", self.db, params=list(playlist_ids))
+
+
+def sync(client, store, playlist_ids, workers=8):
+    """Brings the cache up to date for the playlists and returns counts of what was fetched.
+
+    Only playlists whose snapshot_id moved are re-read, and only tracks
+    without cached features are sent to audio-features. Network calls run
+    on the pool; SQLite writes stay on the calling thread.
+    """
+    playlist_ids = list(dict.fromkeys(playlist_ids))
+    known = store.snapshots()
+    with ThreadPoolExecutor(workers) as pool:
+        snapshots = dict(zip(playlist_ids, pool.map(lambda p: playlist_snapshot(client, p), playlist_ids)))
+        changed = [p for p in playlist_ids if known.get(p) != snapshots[p]]
+        for playlist_id, rows in zip(changed, pool.map(lambda p: playlist_tracks(client, p), changed)):
+            store.save_playlist(playlist_id, snapshots[playlist_id], rows)
+
+        missing = store.missing_features(playlist_ids)
+        chunks = [missing[i:i + FEATURES_BATCH] for i in range(0, len(missing), FEATURES_BATCH)]
+        for chunk, found in zip(chunks, pool.map(lambda chunk: audio_features(client, chunk), chunks)):
+            store.save_features(chunk, found)
+    return {"playlists": len(playlist_ids), "refetched": len(changed), "features_fetched": len(missing)}
+
+
+def export(store, playlist_ids, output):
+    """Writes the joined table as Parquet, so readers can pick columns:
+    pd.read_parquet(output, columns=["danceability", "energy", "valence", "tempo"])
+    """
+    final_df = store.frame(playlist_ids)
+    final_df.to_parquet(output, index=False)
+    return final_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally sync Spotify playlists into a local cache.")
+    parser.add_argument("playlists", nargs="+", help="playlist ids")
+    parser.add_argument("--db", default="spotify_cache.sqlite3")
+    parser.add_argument("--output", default="tracks.parquet")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--base-url", default=os.environ.get("SPOTIFY_API_URL", API_URL))
+    parser.add_argument("--token", default=os.environ.get("SPOTIFY_TOKEN"),
+                        help="bearer token; otherwise SpotifyOAuth reads the SPOTIPY_* variables")
+    args = parser.parse_args()
+
+    client = SpotifyClient(args.token or oauth_token(), base_url=args.base_url)
+    store = TrackStore(args.db)
+    started = time.perf_counter()
+    try:
+        counts = sync(client, store, args.playlists, workers=args.workers)
+        final_df = export(store, args.playlists, args.output)
+    finally:
+        client.close()
+        store.close()
+    print(f"{counts['refetched']}/{counts['playlists']} playlists changed, "
+          f"{counts['features_fetched']} tracks needed features; {client.calls} calls "
+          f"in {time.perf_counter() - started:.1f}s -> {len(final_df)} rows in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
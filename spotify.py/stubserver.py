@@ -0,0 +1,158 @@
+import argparse
+import email.utils
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_LIMIT = 100
+MAX_IDS = 100
+
+
+class StubApi:
+    """Fake Web API data: each playlist id seeds its own track list.
+
+    Requests beyond `rate` per second get a 429 with Retry-After, like the
+    real API's rolling window; `http_date` sends it as a date instead of
+    seconds. A `no_features` share of tracks has no analysis, so
+    audio-features returns null for them.
+    """
+
+    def __init__(self, tracks_per_playlist=250, rate=None, retry_after=1, latency=0.0, http_date=False,
+                 no_features=0.0):
+        self.tracks_per_playlist = tracks_per_playlist
+        self.no_features = no_features
+        self.rate = rate
+        self.retry_after = retry_after
+        self.http_date = http_date
+        self.latency = latency
+        self.requests = 0
+        self.versions = {}
+        self.throttled = 0
+        self._window = []
+        self._lock = threading.Lock()
+
+    def snapshot(self, playlist_id):
+        return f"snap-{playlist_id}-{self.versions.get(playlist_id, 0)}"
+
+    def edit(self, playlist_id):
+        """Changes a playlist's tracks and snapshot_id."""
+        self.versions[playlist_id] = self.versions.get(playlist_id, 0) + 1
+
+    def tracks(self, playlist_id):
+        rng = random.Random(self.snapshot(playlist_id))
+        # Playlists share part of a small catalogue, as real ones do.
+        return [f"track{rng.randrange(self.tracks_per_playlist * 4):06d}" for _ in range(self.tracks_per_playlist)]
+
+    def features(self, track_id):
+        rng = random.Random(track_id)
+        if rng.random() < self.no_features:
+            return None
+        return {"id": track_id, "danceability": rng.random(), "energy": rng.random(),
+                "valence": rng.random(), "tempo": rng.uniform(60, 200)}
+
+    def admit(self):
+        with self._lock:
+            self.requests += 1
+            if self.rate is None:
+                return True
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate:
+                self.throttled += 1
+                return False
+            self._window.append(now)
+            return True
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, body, headers=()):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                return self.send_json(401, {"error": {"status": 401, "message": "No token provided"}})
+            if not api.admit():
+                retry_after = (email.utils.formatdate(time.time() + api.retry_after, usegmt=True)
+                               if api.http_date else str(api.retry_after))
+                return self.send_json(429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                                      [("Retry-After", retry_after)])
+            time.sleep(api.latency)
+            url = urllib.parse.urlsplit(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            parts = url.path.strip("/").split("/")
+            if parts[-3:-2] == ["playlists"] and parts[-1] == "tracks":
+                return self.playlist(parts[-2], query)
+            if parts[-2:-1] == ["playlists"]:
+                return self.send_json(200, {"id": parts[-1], "snapshot_id": api.snapshot(parts[-1])})
+            if parts[-1] == "audio-features":
+                return self.audio_features(query)
+            self.send_json(404, {"error": {"status": 404, "message": "Not found"}})
+
+        def playlist(self, playlist_id, query):
+            limit, offset = int(query.get("limit", MAX_LIMIT)), int(query.get("offset", 0))
+            if not 1 <= limit <= MAX_LIMIT:
+                return self.send_json(400, {"error": {"status": 400, "message": "Invalid limit"}})
+            tracks = api.tracks(playlist_id)
+            items = [{"added_by": {"id": "stub"}, "track": {"id": t, "name": f"Song {t}", "artists": [{"name": "Stub"}]}}
+                     for t in tracks[offset:offset + limit]]
+            next_url = None
+            if offset + limit < len(tracks):
+                query.update(offset=offset + limit, limit=limit)
+                next_url = (f"http://{self.headers['Host']}{urllib.parse.urlsplit(self.path).path}"
+                            f"?{urllib.parse.urlencode(query)}")
+            self.send_json(200, {"items": items, "next": next_url, "total": len(tracks)})
+
+        def audio_features(self, query):
+            ids = [i for i in query.get("ids", "").split(",") if i]
+            if not 1 <= len(ids) <= MAX_IDS:
+                return self.send_json(400, {"error": {"status": 400, "message": "Invalid ids"}})
+            self.send_json(200, {"audio_features": [api.features(i) for i in ids]})
+
+    return Handler
+
+
+def serve(api, host="127.0.0.1", port=0):
+    """Starts the stub in a background thread and returns the server; its API root is at /v1."""
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Spotify Web API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tracks", type=int, default=250, help="tracks per playlist")
+    parser.add_argument("--rate", type=int, help="requests per second before answering 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--http-date", action="store_true", help="send Retry-After as an HTTP-date")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    api = StubApi(args.tracks, args.rate, args.retry_after, args.latency, args.http_date)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(api))
+    print(f"stub Spotify API at http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"{api.requests} requests, {api.throttled} throttled")
+
+
+if __name__ == "__main__":
+    main()
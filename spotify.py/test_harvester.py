@@ -0,0 +1,64 @@
+import email.utils
+import time
+
+import pytest
+
+from harvester import SpotifyClient, audio_features, harvest, playlist_tracks, retry_after
+from stubserver import StubApi, serve
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        api = StubApi(**options)
+        server = serve(api)
+        servers.append(server)
+        client = SpotifyClient("token", base_url=f"http://127.0.0.1:{server.server_port}/v1", backoff=0.01)
+        return api, client
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_playlist_items_follow_next_pages(stub):
+    api, client = stub(tracks_per_playlist=250)
+    rows = playlist_tracks(client, "p1")
+    assert [row["id"] for row in rows] == api.tracks("p1")
+    assert client.calls == 3  # 100 + 100 + 50
+
+
+def test_audio_features_stay_within_the_id_limit(stub):
+    api, client = stub()
+    ids = [f"track{i:06d}" for i in range(250)]
+    features = audio_features(client, ids + ids[:10])
+    assert sorted(features) == ids
+    assert client.calls == 3  # the stub answers 400 to more than 100 ids
+
+
+def test_harvest_joins_features(stub):
+    api, client = stub(tracks_per_playlist=120)
+    df = harvest(client, ["p1", "p2"], workers=2)
+    assert len(df) == 240
+    assert df["danceability"].notna().all()
+
+
+@pytest.mark.parametrize("http_date", [False, True])
+def test_rate_limit_waits_for_retry_after(stub, http_date):
+    api, client = stub(tracks_per_playlist=250, rate=1, retry_after=1, http_date=http_date)
+    started = time.monotonic()
+    rows = playlist_tracks(client, "p1")
+    assert len(rows) == 250
+    assert api.throttled >= 2 and client.throttled == api.throttled
+    assert time.monotonic() - started >= 1.5  # three pages at one request per second
+
+
+def test_retry_after_parses_seconds_and_dates():
+    assert retry_after("3", 9) == 3.0
+    assert retry_after(email.utils.formatdate(time.time() + 30, usegmt=True), 9) == pytest.approx(30, abs=1.5)
+    assert retry_after(email.utils.formatdate(time.time() - 30, usegmt=True), 9) == 0.0
+    assert retry_after("soon", 9) == 9
+    assert retry_after(None, 9) == 9
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from harvester import FEATURE_COLUMNS, SpotifyClient
+from store import TrackStore, export, sync
+from stubserver import StubApi, serve
+
+
+@pytest.fixture
+def api():
+    api = StubApi(tracks_per_playlist=150, no_features=0.2)
+    server = serve(api)
+    api.url = f"http://127.0.0.1:{server.server_port}/v1"
+    yield api
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(api):
+    client = SpotifyClient("token", base_url=api.url)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TrackStore(str(tmp_path / "cache.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_unchanged_playlists_are_not_refetched(api, client, store):
+    ids = ["p1", "p2", "p3"]
+    assert sync(client, store, ids)["refetched"] == 3
+    calls = client.calls
+
+    assert sync(client, store, ids) == {"playlists": 3, "refetched": 0, "features_fetched": 0}
+    assert client.calls == calls + 3  # one snapshot lookup per playlist
+
+    api.edit("p2")
+    assert sync(client, store, ids)["refetched"] == 1
+    assert store.snapshots()["p2"] == api.snapshot("p2")
+    assert store.frame(["p2"])["id"].tolist() == api.tracks("p2")
+
+
+def test_null_features_are_cached(api, client, store):
+    counts = sync(client, store, ["p1"])
+    df = store.frame(["p1"])
+    expected_null = {t for t in api.tracks("p1") if api.features(t) is None}
+    assert expected_null and set(df.loc[df["danceability"].isna(), "id"]) == expected_null
+    assert counts["features_fetched"] == df["id"].nunique()
+    assert store.missing_features(["p1"]) == []
+    assert sync(client, store, ["p1"])["features_fetched"] == 0
+
+
+def test_export_writes_parquet(client, store, tmp_path):
+    sync(client, store, ["p1", "p2"])
+    output = tmp_path / "tracks.parquet"
+    df = export(store, ["p1", "p2"], output)
+    assert len(df) == 300
+    pd.testing.assert_frame_equal(pd.read_parquet(output, columns=FEATURE_COLUMNS), df[FEATURE_COLUMNS])
+
+
+def test_no_playlists(store):
+    assert store.missing_features([]) == []
+    assert store.frame([]).empty